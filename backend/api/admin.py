@@ -1,18 +1,78 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Match, Team, Competition, Player, Event
+import os
+import secrets
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from services.export_service import EXPORT_FORMATS, EXPORT_MODELS, EXPORT_UPDATED_SINCE, stream_export
+from services.request_metrics import reset_route_stats, worst_routes
 
-router = APIRouter(prefix="/api/admin")
+# Token requerido en el header X-Admin-Token; sin token configurado las rutas quedan deshabilitadas
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
 
+def require_admin_token(x_admin_token: str = Header(None)):
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Rutas de administración deshabilitadas (falta ADMIN_API_TOKEN)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Token de administración inválido")
+
+router = APIRouter(prefix="/api/admin", dependencies=[Depends(require_admin_token)])
+
+def _export_response(request: Request, entity: str, export_format: str, filters: dict) -> StreamingResponse:
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    if export_format != "json":
+        headers["Content-Disposition"] = f'attachment; filename="{entity}.{export_format}"'
+    return StreamingResponse(
+        stream_export(entity, export_format, compress=compress, **filters),
+        media_type=EXPORT_FORMATS[export_format],
+        headers=headers
+    )
+
+@router.get("/export/{entity}")
+def export_entity(
+    entity: str,
+    request: Request,
+    format: str = Query("ndjson", description="ndjson, csv o json"),
+    competition_id: int = Query(None, description="Filtrar por competición"),
+    date_from: datetime = Query(None, description="Partidos desde esta fecha (inclusive)"),
+    date_to: datetime = Query(None, description="Partidos hasta esta fecha (exclusive)"),
+    updated_since: datetime = Query(None, description="Solo filas modificadas desde esta fecha")
+):
+    """
+    Exporta en streaming partidos, equipos o eventos, leyendo la BD por lotes con un cursor del
+    servidor. Se comprime con gzip si el cliente lo acepta (Accept-Encoding).
+    """
+    if entity not in EXPORT_MODELS:
+        raise HTTPException(status_code=404, detail=f"Entidad desconocida: {entity}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato inválido. Usa ndjson, csv o json")
+    if updated_since is not None and entity not in EXPORT_UPDATED_SINCE:
+        raise HTTPException(status_code=400, detail=f"updated_since no está disponible para {entity}")
+    filters = {"competition_id": competition_id, "date_from": date_from, "date_to": date_to, "updated_since": updated_since}
+    return _export_response(request, entity, format, filters)
+
+# Rutas anteriores: mismo array JSON, ahora transmitido por lotes
 @router.get("/matches")
-def get_all_matches(db: Session = Depends(get_db)):
-    return db.query(Match).all()
+def get_all_matches(request: Request):
+    return _export_response(request, "matches", "json", {})
 
 @router.get("/teams")
-def get_all_teams(db: Session = Depends(get_db)):
-    return db.query(Team).all()
+def get_all_teams(request: Request):
+    return _export_response(request, "teams", "json", {})
 
 @router.get("/events")
-def get_all_events(db: Session = Depends(get_db)):
-    return db.query(Event).all()
\ No newline at end of file
+def get_all_events(request: Request):
+    return _export_response(request, "events", "json", {})
+
+@router.get("/request-metrics")
+def get_request_metrics(limit: int = Query(20, ge=1, le=200), reset: bool = Query(False, description="Reiniciar los contadores después de leerlos")):
+    """
+    Rutas con más consultas SQL por petición desde el arranque (o el último reinicio),
+    con su tiempo de BD y la sentencia más lenta.
+    """
+    routes = worst_routes(limit)
+    if reset:
+        reset_route_stats()
+    return routes
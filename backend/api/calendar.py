@@ -1,73 +1,113 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import extract, desc
-from database import get_db
-from models import Match, Competition, Team
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc
+from database import get_async_db
+from services.cache import cached_json_response_async
+from services.league_snapshot import get_league_snapshot_async
+from models import Match, Team
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 
 router = APIRouter(prefix="/api")
 
+# Límites de year/month: fuera de rango FastAPI responde 422 en vez de fallar al armar la fecha
+MIN_YEAR, MAX_YEAR = 1900, 2100
+
+def _month_range(year: int, month: int):
+    """
+    [inicio, fin) del mes, para filtrar Match.date por rango y usar su índice.
+    """
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+async def _resolve_competition_id(db: AsyncSession, competition_id: Optional[int]) -> Optional[int]:
+    # Sin parámetro, se usa la competición principal (PRIMERA DIVISIÓN 2025)
+    if competition_id is not None:
+        return competition_id
+    competition = (await get_league_snapshot_async(db)).find_competition()
+    return competition.id if competition else None
+
 @router.get("/calendar-matches", response_model=List[int])
-def get_calendar_matches(
-    year: int = Query(..., description="Año para buscar partidos"),
-    month: int = Query(..., description="Mes para buscar partidos"),
-    db: Session = Depends(get_db)
+async def get_calendar_matches(
+    year: int = Query(..., ge=MIN_YEAR, le=MAX_YEAR, description="Año para buscar partidos"),
+    month: int = Query(..., ge=1, le=12, description="Mes para buscar partidos"),
+    competition_id: int = Query(None, description="Competición (por defecto PRIMERA DIVISIÓN 2025)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Devuelve una lista de los días del mes especificado que tienen al menos un partido.
     """
-    competition = db.query(Competition).filter(
-        Competition.name == "PRIMERA DIVISIÓN",
-        Competition.season == "2025"
-    ).first()
-
-    if not competition:
+    start, end = _month_range(year, month)
+    competition_id = await _resolve_competition_id(db, competition_id)
+    if competition_id is None:
         return []
+    return await db.run_sync(_calendar_match_days, competition_id, start, end)
 
-    days_with_matches_query = db.query(extract('day', Match.date).label("day")) \
-        .filter(Match.competition_id == competition.id) \
-        .filter(extract('year', Match.date) == year) \
-        .filter(extract('month', Match.date) == month) \
-        .distinct()
-
-    days = [day[0] for day in days_with_matches_query.all()]
-    
-    return days
+def _calendar_match_days(db: Session, competition_id: int, start: datetime, end: datetime) -> List[int]:
+    dates = db.query(Match.date).filter(
+        Match.competition_id == competition_id,
+        Match.date >= start,
+        Match.date < end
+    ).distinct()
+    return sorted({match_date.day for (match_date,) in dates})
 
 @router.get("/calendar-view")
-def get_calendar_view_data(db: Session = Depends(get_db)) -> Dict[str, List[Dict[str, Any]]]:
+async def get_calendar_view_data(
+    request: Request,
+    competition_id: int = Query(None, description="Competición (por defecto PRIMERA DIVISIÓN 2025)"),
+    year: int = Query(None, ge=MIN_YEAR, le=MAX_YEAR, description="Año (junto con month, devuelve solo ese mes)"),
+    month: int = Query(None, ge=1, le=12, description="Mes (junto con year, devuelve solo ese mes)"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Devuelve todos los partidos agrupados por mes y año para la vista de calendario.
+    Con year y month devuelve solo ese mes (cada mes queda cacheado por separado).
     """
-    competition = db.query(Competition).filter(
-        Competition.name == "PRIMERA DIVISIÓN",
-        Competition.season == "2025"
-    ).first()
+    date_range = None
+    if year is not None or month is not None:
+        if year is None or month is None:
+            raise HTTPException(status_code=400, detail="year y month deben indicarse juntos")
+        date_range = _month_range(year, month)
+
+    async def compute():
+        resolved_id = await _resolve_competition_id(db, competition_id)
+        if resolved_id is None:
+            return {}
+        return await db.run_sync(_build_calendar_view_data, resolved_id, date_range)
+
+    return await cached_json_response_async(request, compute)
 
-    if not competition:
-        return {}
+def _build_calendar_view_data(db: Session, competition_id: int, date_range=None) -> Dict[str, List[Dict[str, Any]]]:
+    HomeTeam = aliased(Team)
+    AwayTeam = aliased(Team)
 
-    matches = db.query(Match).filter(Match.competition_id == competition.id).order_by(desc(Match.date)).all()
+    # Una sola consulta: partidos con los nombres de ambos equipos
+    query = db.query(
+        Match.match_id_comet, Match.date, Match.home_score, Match.away_score,
+        Match.facility, Match.status, Match.round,
+        HomeTeam.name.label("home_team_name"),
+        AwayTeam.name.label("away_team_name")
+    ).outerjoin(HomeTeam, Match.home_team_id == HomeTeam.id)\
+     .outerjoin(AwayTeam, Match.away_team_id == AwayTeam.id)\
+     .filter(Match.competition_id == competition_id, Match.date.isnot(None))
+    if date_range:
+        query = query.filter(Match.date >= date_range[0], Match.date < date_range[1])
 
     grouped_matches: Dict[str, List[Dict[str, Any]]] = {}
-    
-    for match in matches:
-        if not match.date:
-            continue
-        
+
+    for match in query.order_by(desc(Match.date), desc(Match.id)):
         month_year = match.date.strftime("%B %Y").upper()
-        
+
         if month_year not in grouped_matches:
             grouped_matches[month_year] = []
 
-        home_team = db.query(Team).get(match.home_team_id)
-        away_team = db.query(Team).get(match.away_team_id)
-
         grouped_matches[month_year].append({
             "id": match.match_id_comet,
             "date": match.date.isoformat(),
-            "home_team_name": home_team.name if home_team else "N/A",
-            "away_team_name": away_team.name if away_team else "N/A",
+            "home_team_name": match.home_team_name or "N/A",
+            "away_team_name": match.away_team_name or "N/A",
             "home_score": match.home_score,
             "away_score": match.away_score,
             "facility": match.facility,
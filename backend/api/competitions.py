@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from database import get_db
-from models import Competition
+from services.league_snapshot import get_league_snapshot
 
 router = APIRouter(prefix="/api")
 
@@ -11,7 +11,7 @@ def get_competitions(db: Session = Depends(get_db)):
     """
     Obtiene la lista de todas las competiciones disponibles.
     """
-    competitions = db.query(Competition).all()
+    competitions = get_league_snapshot(db).competitions.values()
     return [
         {
             "id": comp.id,
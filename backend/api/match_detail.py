@@ -1,20 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Match, Event, Player, Team
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from services.cache import cached_json_response_async
+from services.league_snapshot import LeagueSnapshot, get_league_snapshot_async
 
 router = APIRouter(prefix="/api")
 
 @router.get("/match-detail/{match_id_comet}")
-def get_match_detail(match_id_comet: int, db: Session = Depends(get_db)):
-    match = db.query(Match).filter(Match.match_id_comet == match_id_comet).first()
+async def get_match_detail(match_id_comet: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # La respuesta queda cacheada por partido hasta la próxima sincronización
+    async def compute():
+        return _build_match_detail(await get_league_snapshot_async(db), match_id_comet)
+
+    return await cached_json_response_async(request, compute)
+
+def _build_match_detail(snapshot: LeagueSnapshot, match_id_comet: int):
+    match = snapshot.matches_by_comet.get(match_id_comet)
     if not match:
         raise HTTPException(status_code=404, detail="Partido no encontrado")
 
-    events = db.query(Event).filter(Event.match_id == match.id).order_by(Event.minute).all()
-
-    home_team = db.query(Team).filter(Team.id == match.home_team_id).first()
-    away_team = db.query(Team).filter(Team.id == match.away_team_id).first()
+    home_team = snapshot.teams.get(match.home_team_id)
+    away_team = snapshot.teams.get(match.away_team_id)
 
     result = {
         "match": {
@@ -31,9 +37,9 @@ def get_match_detail(match_id_comet: int, db: Session = Depends(get_db)):
         "events": []
     }
 
-    for event in events:
-        player = db.query(Player).filter(Player.id == event.player_id).first()
-        team = db.query(Team).filter(Team.id == event.team_id).first()
+    for event in snapshot.events_by_match.get(match.id, ()):
+        player = snapshot.players.get(event.player_id)
+        team = snapshot.teams.get(event.team_id)
 
         event_data = {
             "type": event.event_type,
@@ -47,11 +53,11 @@ def get_match_detail(match_id_comet: int, db: Session = Depends(get_db)):
             "accumulated_yellow": event.accumulated_yellow
         }
 
-        # Si es una sustitución, buscar el nombre del segundo jugador
+        # Si es una sustitución, agregar el nombre del segundo jugador
         if event.event_type == 'Substitution' and event.second_player_id:
-            player_out = db.query(Player).filter(Player.id == event.second_player_id).first()
-            event_data['player_out_name'] = player_out.name if player_out else "Desconocido"
-        
+            player_out = snapshot.players.get(event.second_player_id)
+            event_data['player_out_name'] = player_out.name if player_out and player_out.name else "Desconocido"
+
         result["events"].append(event_data)
 
     return result
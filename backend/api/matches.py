@@ -1,38 +1,27 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session, aliased
-from sqlalchemy import asc
-from database import get_db
-from models import Match, Team, Competition, Event
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from services.league_snapshot import get_league_snapshot_async
 from datetime import datetime
 
 router = APIRouter(prefix="/api")
 
 @router.get("/rounds")
-def get_rounds(db: Session = Depends(get_db)):
+async def get_rounds(db: AsyncSession = Depends(get_async_db)):
     """
     Obtiene una lista ordenada de todas las rondas y la última ronda jugada.
     """
-    competition = db.query(Competition).filter(
-        Competition.name == "PRIMERA DIVISIÓN",
-        Competition.season == "2025"
-    ).first()
+    snapshot = await get_league_snapshot_async(db)
+    competition = snapshot.find_competition()
     
     if not competition:
         raise HTTPException(status_code=404, detail="Competición no encontrada")
 
     # Obtener todas las rondas únicas
-    rounds_query = db.query(Match.round).filter(Match.competition_id == competition.id).distinct().all()
-    rounds_tuples = [r[0] for r in rounds_query if r[0] is not None]
-    all_rounds_sorted = sorted(rounds_tuples, key=lambda x: int("".join(filter(str.isdigit, x)) or 0))
+    all_rounds_sorted = sorted(snapshot.rounds(competition.id), key=lambda x: int("".join(filter(str.isdigit, x)) or 0))
 
     # Encontrar la última ronda con al menos un partido jugado
-    latest_played_round_query = db.query(Match.round)\
-        .filter(Match.competition_id == competition.id)\
-        .filter(Match.status == 'played')\
-        .order_by(Match.date.desc())\
-        .first()
-    
-    last_played_round = latest_played_round_query[0] if latest_played_round_query else None
+    last_played_round = snapshot.latest_played_round(competition.id)
 
     return {
         "all_rounds": all_rounds_sorted,
@@ -40,65 +29,65 @@ def get_rounds(db: Session = Depends(get_db)):
     }
 
 @router.get("/matches")
-def get_matches(
+async def get_matches(
+    response: Response,
     date: str = Query(None, description="Filtrar por fecha (YYYY-MM-DD)"),
     team_id: int = Query(None, description="Filtrar por equipo (team_id_comet)"),
     round: str = Query(None, description="Filtrar por número de fecha"),
-    db: Session = Depends(get_db)
+    limit: int = Query(None, ge=1, description="Cantidad máxima de partidos (paginación por fecha)"),
+    after: str = Query(None, description="Cursor devuelto en X-Next-Cursor para pedir la página siguiente"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    competition = db.query(Competition).filter(
-        Competition.name == "PRIMERA DIVISIÓN",
-        Competition.season == "2025"
-    ).first()
+    snapshot = await get_league_snapshot_async(db)
+    competition = snapshot.find_competition()
     
     if not competition:
         raise HTTPException(status_code=404, detail="Competición PRIMERA DIVISIÓN 2025 no encontrada")
 
-    HomeTeam = aliased(Team)
-    AwayTeam = aliased(Team)
-
-    query = db.query(Match).join(HomeTeam, Match.home_team_id == HomeTeam.id).join(AwayTeam, Match.away_team_id == AwayTeam.id)
-    query = query.filter(Match.competition_id == competition.id)
+    # Partir del índice más selectivo disponible (ya ordenados por fecha e id)
+    if round:
+        matches = snapshot.matches_by_round.get((competition.id, round), ())
+    else:
+        matches = snapshot.competition_matches(competition.id)
 
     if date:
         try:
             target_date = datetime.strptime(date, "%Y-%m-%d")
-            next_day = target_date.replace(hour=23, minute=59, second=59)
-            query = query.filter(Match.date >= target_date, Match.date <= next_day)
         except ValueError:
             raise HTTPException(status_code=400, detail="Formato de fecha inválido. Usa YYYY-MM-DD")
+        day_matches = {m.id for m in snapshot.matches_by_day.get(target_date.date(), ())}
+        matches = [m for m in matches if m.id in day_matches]
 
     if team_id:
-        team_exists = db.query(Team).filter(Team.team_id_comet == team_id).first()
-        if not team_exists:
+        team = snapshot.teams_by_comet.get(team_id)
+        if not team:
             raise HTTPException(status_code=404, detail=f"Equipo con team_id_comet={team_id} no encontrado")
-        query = query.filter((HomeTeam.team_id_comet == team_id) | (AwayTeam.team_id_comet == team_id))
+        matches = [m for m in matches if team.id in (m.home_team_id, m.away_team_id)]
 
-    if round:
-        query = query.filter(Match.round == round)
+    # Solo partidos con ambos equipos cargados
+    matches = [m for m in matches if m.home_team_id in snapshot.teams and m.away_team_id in snapshot.teams]
+
+    # Paginación por clave (fecha, id): cada página continúa después del último partido devuelto
+    if after:
+        try:
+            after_date_str, after_id_str = after.rsplit("|", 1)
+            after_date, after_id = datetime.fromisoformat(after_date_str), int(after_id_str)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+        matches = [m for m in matches if m.date and (m.date, m.id) > (after_date, after_id)]
 
-    matches = query.order_by(Match.date).all()
+    if limit:
+        matches = matches[:limit]
 
-    if not matches:
-        return []
+    if limit and len(matches) == limit and matches[-1].date:
+        last_match = matches[-1]
+        response.headers["X-Next-Cursor"] = f"{last_match.date.isoformat()}|{last_match.id}"
 
     result = []
     for match in matches:
-        home_team = db.query(Team).filter(Team.id == match.home_team_id).first()
-        away_team = db.query(Team).filter(Team.id == match.away_team_id).first()
-
-        if not home_team or not away_team:
-            continue
-
-        home_events_count = db.query(Event).filter(
-            Event.match_id == match.id,
-            Event.team_id == match.home_team_id
-        ).count()
-        away_events_count = db.query(Event).filter(
-            Event.match_id == match.id,
-            Event.team_id == match.away_team_id
-        ).count()
-
+        home_team = snapshot.teams[match.home_team_id]
+        away_team = snapshot.teams[match.away_team_id]
+        events = snapshot.events_by_match.get(match.id, ())
         result.append({
             "id": match.match_id_comet,
             "home_team": {
@@ -117,8 +106,8 @@ def get_matches(
             "home_score": match.home_score,
             "away_score": match.away_score,
             "facility": match.facility,
-            "home_team_events": home_events_count,
-            "away_team_events": away_events_count
+            "home_team_events": sum(1 for e in events if e.team_id == match.home_team_id),
+            "away_team_events": sum(1 for e in events if e.team_id == match.away_team_id)
         })
 
     return result
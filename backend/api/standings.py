@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from database import get_db
-from services.standings_service import calculate_standings, calculate_standings_with_recent_results
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
+from services.cache import cached_json_response_async
+from services.standings_service import RECENT_FORM_MATCHES, calculate_standings, calculate_standings_with_recent_results
 
 router = APIRouter(prefix="/api")
 
 @router.get("/standings/{competition_id}")
-def get_standings(
+async def get_standings(
     competition_id: int, 
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     zone: str = Query(None, description="Filtrar la tabla de posiciones por una zona específica (ej: A, B)"),
     limit: int = Query(100, description="Número máximo de equipos a mostrar")
 ):
@@ -18,26 +20,34 @@ def get_standings(
     - **zone**: (Opcional) Nombre de la zona para filtrar.
     - **limit**: (Opcional) Limita el número de equipos devueltos.
     """
-    standings = calculate_standings(db, competition_id, zone=zone)
-    
-    if isinstance(standings, list) and limit:
-        return standings[:limit]
-        
-    return standings
+    async def compute():
+        standings = await db.run_sync(calculate_standings, competition_id, zone=zone)
+
+        if isinstance(standings, list) and limit:
+            return standings[:limit]
+
+        return standings
+
+    return await cached_json_response_async(request, compute)
 
 @router.get("/standings-extended/{competition_id}")
-def get_standings_extended(
+async def get_standings_extended(
     competition_id: int, 
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     zone: str = Query(None, description="Filtrar la tabla de posiciones por una zona específica (ej: A, B)"),
-    limit: int = Query(100, description="Número máximo de equipos a mostrar")
+    limit: int = Query(100, description="Número máximo de equipos a mostrar"),
+    recent: int = Query(RECENT_FORM_MATCHES, ge=1, le=20, description="Cantidad de últimos resultados por equipo")
 ):
     """
-    Obtiene la tabla de posiciones para una competición, incluyendo los últimos 5 resultados de cada equipo.
+    Obtiene la tabla de posiciones para una competición, incluyendo los últimos resultados de cada equipo.
     """
-    standings = calculate_standings_with_recent_results(db, competition_id, zone=zone)
-    
-    if isinstance(standings, list) and limit:
-        return standings[:limit]
-        
-    return standings
\ No newline at end of file
+    async def compute():
+        standings = await db.run_sync(calculate_standings_with_recent_results, competition_id, zone=zone, recent_count=recent)
+
+        if isinstance(standings, list) and limit:
+            return standings[:limit]
+
+        return standings
+
+    return await cached_json_response_async(request, compute)
\ No newline at end of file
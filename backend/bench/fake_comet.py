@@ -0,0 +1,238 @@
+"""
+Servidor local que imita los reportes de COMET (`/areports/run/{template}/{page}/{size}`)
+con una liga sintética de tamaño configurable. Permite medir la sincronización sin
+salir a latam.analyticom.de:
+
+    python bench/fake_comet.py --teams 16 --matches 240 --events-per-match 8 --seasons 2
+    COMET_REPORTS_URL=http://127.0.0.1:8765/areports/run python run_sync_cli.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Mismos templates que services/sync_service.py y services/sync_service_ba.py
+MATCHES_TEMPLATE_ID = 3318704
+EVENTS_TEMPLATE_ID = 3315314
+ZONES_TEMPLATE_ID = 3315540
+
+CURRENT_SEASON = 2025
+SQUAD_SIZE = 22
+INTERZONAL = "INTERZONAL"
+COMPETITION = {"competitionType": "PRIMERA DIVISIÓN", "category": "PRIMERA", "gender": "MALE"}
+
+# Tipos de evento y su peso relativo (mismos nombres que manda COMET)
+EVENT_TYPES = [
+    ("Goal", 30), ("Penalty", 3), ("Own goal", 2),
+    ("Yellow card", 35), ("Red card", 5), ("Substitution", 25),
+]
+GOAL_EVENT_TYPES = {"Goal", "Penalty", "Own goal"}
+
+REPORT_PATH = re.compile(r"/areports/run/(\d+)/(\d+)/(\d+)/?$")
+
+
+def _timestamp_ms(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+def build_reports(teams: int = 16, matches: int = 240, events_per_match: int = 8, seasons: int = 1, seed: int = 2025) -> dict:
+    """
+    Genera los reportes de partidos, eventos y zonas de una liga sintética.
+    `matches` es por temporada; en la temporada actual el último 10% de las fechas queda
+    sin jugar. Los eventos se ordenan de la temporada más nueva a la más vieja, como el
+    reporte real. Devuelve {template_id: (reportName, filas)}.
+    """
+    rng = random.Random(seed)
+    event_names = [name for name, _ in EVENT_TYPES]
+    event_weights = [weight for _, weight in EVENT_TYPES]
+    team_ids = [10000 + i for i in range(teams)]
+    team_names = {team_id: f"Club Sintético {i + 1}" for i, team_id in enumerate(team_ids)}
+    team_zone = {team_id: "Zona A" if i % 2 == 0 else "Zona B" for i, team_id in enumerate(team_ids)}
+    matches_per_round = max(1, teams // 2)
+
+    match_rows, event_rows, zone_rows = [], [], []
+    event_id = 1
+    for season_index in range(seasons):
+        season_year = CURRENT_SEASON - season_index
+        season = str(season_year)
+        season_start = datetime(season_year, 3, 1, 16, 0)
+        total_rounds = (matches + matches_per_round - 1) // matches_per_round
+        unplayed_from = total_rounds - total_rounds // 10 if season_year == CURRENT_SEASON else total_rounds + 1
+
+        season_events = []
+        for m in range(matches):
+            match_id = season_year * 100000 + m
+            round_number = m // matches_per_round + 1
+            home_id, away_id = rng.sample(team_ids, 2)
+            played = round_number < unplayed_from
+            match_date = season_start + timedelta(days=7 * (round_number - 1), hours=2 * (m % matches_per_round))
+            zone = team_zone[home_id] if team_zone[home_id] == team_zone[away_id] else INTERZONAL
+
+            home_goals = away_goals = 0
+            match_events = []
+            if played:
+                for _ in range(events_per_match):
+                    is_home = rng.random() < 0.5
+                    team_id = home_id if is_home else away_id
+                    event_type = rng.choices(event_names, event_weights)[0]
+                    minute = rng.randint(1, 90)
+                    if event_type in GOAL_EVENT_TYPES:
+                        if is_home:
+                            home_goals += 1
+                        else:
+                            away_goals += 1
+                    person_id = team_id * 100 + rng.randrange(SQUAD_SIZE)
+                    match_events.append({
+                        "id": event_id,
+                        "teamId": team_id,
+                        "personId": person_id,
+                        "personName": f"Jugador {person_id}",
+                        "matchEventType": event_type,
+                        "eventSubType": None,
+                        "minute": str(minute),
+                        "phase": "FIRST_HALF" if minute <= 45 else "SECOND_HALF",
+                        "home": "Sí" if is_home else "No",
+                        "stoppageTime": None,
+                        "accumulatedYellow": None,
+                        "secondPersonId": team_id * 100 + rng.randrange(SQUAD_SIZE) if event_type == "Substitution" else None,
+                    })
+                    event_id += 1
+
+            description = f"{team_names[home_id]} - {team_names[away_id]}"
+            if played:
+                description += f" {home_goals}:{away_goals}"
+            match_info = {
+                **COMPETITION,
+                "season": season,
+                "matchId": match_id,
+                "matchDescription": description,
+                "matchStatus": "PLAYED" if played else "SCHEDULED",
+                "round": str(round_number),
+            }
+            match_rows.append({
+                **match_info,
+                "homeTeam": home_id,
+                "awayTeam": away_id,
+                "assocName": "Liga Sintética",
+                "refereeId": None,
+                "matchDate": _timestamp_ms(match_date),
+                "facility": f"Cancha {home_id}",
+            })
+            zone_rows.append({"matchId": match_id, "season": season, "name": f"Torneo {season} - {zone}"})
+            for row in match_events:
+                row.update(match_info, date=_timestamp_ms(match_date))
+            season_events.extend(match_events)
+        event_rows.extend(season_events)
+
+    return {
+        MATCHES_TEMPLATE_ID: ("Lista de Partidos", match_rows),
+        EVENTS_TEMPLATE_ID: ("Eventos en Partidos", event_rows),
+        ZONES_TEMPLATE_ID: ("Zonas", zone_rows),
+    }
+
+
+class FakeCometServer:
+    """
+    Sirve los reportes en páginas con el formato de COMET ({reportName, lastPage, results})
+    desde un hilo propio. `max_page_size` limita el tamaño de página pedido por el cliente
+    (sirve para forzar más páginas con ligas chicas). Cuenta páginas y filas servidas.
+    """
+    def __init__(self, reports: dict, host: str = "127.0.0.1", port: int = 0, max_page_size: int = None):
+        self.reports = reports
+        self.max_page_size = max_page_size
+        self.pages_served = 0
+        self.rows_served = 0
+        self._counter_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/areports/run"
+
+    def reset_counters(self):
+        with self._counter_lock:
+            self.pages_served = 0
+            self.rows_served = 0
+
+    def page(self, template_id: int, page: int, size: int):
+        if template_id not in self.reports:
+            return None
+        report_name, rows = self.reports[template_id]
+        if self.max_page_size:
+            size = min(size, self.max_page_size)
+        size = max(1, size)
+        last_page = max(0, (len(rows) - 1) // size)
+        results = rows[page * size:(page + 1) * size]
+        with self._counter_lock:
+            self.pages_served += 1
+            self.rows_served += len(results)
+        return {"reportName": report_name, "lastPage": last_page, "results": results}
+
+    def _handler_class(self):
+        server = self
+
+        class ReportHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                match = REPORT_PATH.search(urlparse(self.path).path)
+                payload = server.page(*map(int, match.groups())) if match else None
+                if payload is None:
+                    self.send_error(404, "Reporte no encontrado")
+                    return
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ReportHandler
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-comet", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--teams", type=int, default=16, help="Equipos de la liga.")
+    parser.add_argument("--matches", type=int, default=240, help="Partidos por temporada.")
+    parser.add_argument("--events-per-match", type=int, default=8, help="Eventos por partido jugado.")
+    parser.add_argument("--seasons", type=int, default=1, help="Temporadas (la actual es 2025, las demás hacia atrás).")
+    parser.add_argument("--max-page-size", type=int, default=None, help="Tamaño máximo de página servido.")
+    parser.add_argument("--seed", type=int, default=2025, help="Semilla de la generación.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita los reportes de COMET.")
+    add_scale_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    reports = build_reports(args.teams, args.matches, args.events_per_match, args.seasons, args.seed)
+    server = FakeCometServer(reports, args.host, args.port, args.max_page_size)
+    for template_id, (report_name, rows) in reports.items():
+        print(f"📄 Reporte {template_id} ({report_name}): {len(rows)} filas")
+    print(f"🚀 COMET local en {server.url} (usa COMET_REPORTS_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servidor detenido")
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
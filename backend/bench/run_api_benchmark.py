@@ -0,0 +1,196 @@
+"""
+Mide la latencia (p50/p95) y la cantidad de sentencias SQL de cada endpoint público,
+llamando a la app ASGI en el mismo proceso sobre una liga sintética (bench/synthetic_league.py).
+
+    python bench/run_api_benchmark.py --competitions 4 --zones 3 --teams-per-zone 8
+    python bench/run_api_benchmark.py --output actual.json --baseline anterior.json
+
+Cada endpoint se mide "sin caché" (justo después de una sincronización: generación nueva
+y foto de la liga reconstruida) y "con caché". Con --baseline se marcan las regresiones
+y el script termina con código 1 si encuentra alguna.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def build_endpoints(db) -> list:
+    """
+    Endpoints a medir (uno o más por router), con IDs tomados de la liga generada.
+    """
+    from models import Competition, Match, Player, Event
+    from services.league_snapshot import MAIN_COMPETITION_NAME
+
+    competition_id = db.query(Competition.id).filter(Competition.name == MAIN_COMPETITION_NAME).order_by(Competition.id).scalar()
+    zone = db.query(Match.zone).filter(Match.competition_id == competition_id, Match.zone != "INTERZONAL").order_by(Match.zone).limit(1).scalar()
+    match_uid = db.query(Match.match_id_comet).filter(Match.competition_id == competition_id, Match.status == "PLAYED").order_by(Match.id).limit(1).scalar()
+    player_id = db.query(Event.player_id).filter(Event.event_type == "Goal").order_by(Event.id).limit(1).scalar() \
+        or db.query(Player.id).order_by(Player.id).limit(1).scalar()
+    first_date = db.query(Match.date).filter(Match.competition_id == competition_id).order_by(Match.date).limit(1).scalar()
+
+    return [
+        f"/api/standings/{competition_id}",
+        f"/api/standings/{competition_id}?zone={zone}",
+        f"/api/standings-extended/{competition_id}",
+        f"/api/standings-extended/{competition_id}?zone={zone}",
+        f"/api/zonal-standings?competition_name={MAIN_COMPETITION_NAME}",
+        "/api/competitions",
+        f"/api/competitions/{competition_id}/zones",
+        "/api/rounds",
+        "/api/matches",
+        "/api/matches?round=Fecha%201",
+        "/api/matches?limit=20",
+        "/api/matches-with-stats",
+        f"/api/match-detail/{match_uid}",
+        f"/api/top-scorers/{competition_id}",
+        f"/api/top-scorers/{competition_id}?zone={zone}",
+        f"/api/stats/clean-sheets/{competition_id}",
+        f"/api/stats/clean-sheets/{competition_id}?zone={zone}",
+        f"/api/stats/player-sanctions/{competition_id}",
+        f"/api/stats/goals-by-minute?competition_id={competition_id}",
+        f"/api/stats/cards-by-team?competition_id={competition_id}",
+        f"/api/stats/top-scorers-by-team?competition_id={competition_id}",
+        f"/api/stats/avg-goals-per-match?competition_id={competition_id}",
+        f"/api/stats/streaks?competition_id={competition_id}",
+        f"/api/calendar-matches?year={first_date.year}&month={first_date.month}",
+        "/api/calendar-view",
+        "/api/main-dashboard-data",
+        f"/api/player/{player_id}",
+        f"/api/player/{player_id}/goals",
+        f"/api/player/{player_id}/sanctions",
+    ]
+
+def measure(client, url: str, repetitions: int, cold: bool, statements: list) -> dict:
+    from services.cache import bump_generation
+    from services.league_snapshot import refresh_league_snapshot
+
+    timings, counts, status = [], [], None
+    client.get(url)
+    for _ in range(repetitions):
+        if cold:
+            bump_generation()
+            refresh_league_snapshot()
+        statements[0] = 0
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        counts.append(statements[0])
+        status = response.status_code
+    return {
+        "status": status,
+        "p50_ms": percentile(timings, 0.50),
+        "p95_ms": percentile(timings, 0.95),
+        "sql": statistics.median(counts),
+    }
+
+def find_regressions(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list:
+    """
+    Más sentencias SQL que antes es regresión siempre; la latencia solo si el p95 sube más
+    que la tolerancia relativa y que `min_delta_ms` (evita falsos positivos por ruido).
+    """
+    regressions = []
+    for url, current in results.items():
+        previous = baseline.get(url)
+        if not previous:
+            continue
+        for mode in ("cold", "warm"):
+            now, before = current[mode], previous[mode]
+            if now["sql"] > before["sql"]:
+                regressions.append(f"{url} [{mode}] SQL {before['sql']} -> {now['sql']}")
+            if now["p95_ms"] > before["p95_ms"] * (1 + tolerance) and now["p95_ms"] - before["p95_ms"] > min_delta_ms:
+                regressions.append(f"{url} [{mode}] p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia y SQL por endpoint sobre una liga sintética.")
+    parser.add_argument("--competitions", type=int, default=2)
+    parser.add_argument("--zones", type=int, default=2)
+    parser.add_argument("--teams-per-zone", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument("--interzonal-rounds", type=int, default=1)
+    parser.add_argument("--events-per-match", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=30, help="Repeticiones por endpoint y modo.")
+    parser.add_argument("--database", help="URL de la BD de pruebas (se borra y recrea). Por defecto, un SQLite temporal.")
+    parser.add_argument("--output", help="Guarda los resultados en este archivo JSON.")
+    parser.add_argument("--baseline", help="Resultados JSON anteriores para detectar regresiones.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Aumento de p95 tolerado frente al baseline (0.25 = 25%%).")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Aumento mínimo de p95 (ms) para considerarlo regresión.")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    # La BD se elige al importar `database`: hay que fijarla antes de cargar la app
+    os.environ["DATABASE_URL"] = args.database or f"sqlite:///{os.path.join(tmpdir.name, 'api_bench.db')}"
+
+    from sqlalchemy import event
+    from fastapi.testclient import TestClient
+    import database
+    from models import Base
+    from synthetic_league import generate_league
+
+    Base.metadata.drop_all(bind=database.engine)
+    Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        totals = generate_league(db, args.competitions, args.zones, args.teams_per_zone, args.rounds,
+                                 args.interzonal_rounds, args.events_per_match)
+        db.commit()
+        endpoints = build_endpoints(db)
+    finally:
+        db.close()
+    print("🏟️  Liga sintética: " + ", ".join(f"{count} {table}" for table, count in totals.items()))
+
+    statements = [0]
+    def count_statement(*_):
+        statements[0] += 1
+    event.listen(database.engine, "before_cursor_execute", count_statement)
+    event.listen(database.async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    import main as app_module
+    results = {}
+    # Los prints de la app ensucian la tabla: se descartan mientras se mide
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), \
+            TestClient(app_module.app, raise_server_exceptions=False) as client:
+        for url in endpoints:
+            results[url] = {
+                "cold": measure(client, url, args.requests, True, statements),
+                "warm": measure(client, url, args.requests, False, statements),
+            }
+
+    header = f"{'endpoint':<58} {'status':>6} {'p50 sin caché':>14} {'p95 sin caché':>14} {'SQL':>5} {'p50 caché':>10} {'p95 caché':>10} {'SQL':>5}"
+    print(header)
+    print("-" * len(header))
+    for url, r in results.items():
+        cold, warm = r["cold"], r["warm"]
+        print(f"{url[:58]:<58} {cold['status']:>6} {cold['p50_ms']:>11.2f} ms {cold['p95_ms']:>11.2f} ms {cold['sql']:>5g} "
+              f"{warm['p50_ms']:>7.2f} ms {warm['p95_ms']:>7.2f} ms {warm['sql']:>5g}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Resultados guardados en {args.output}")
+
+    tmpdir.cleanup()
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\n⚠️  Regresiones frente al baseline:")
+            for line in regressions:
+                print(f"   - {line}")
+            sys.exit(1)
+        print("\n✅ Sin regresiones frente al baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Genera una liga sintética directamente en la BD (esquema de models.py): competiciones
+divididas en zonas, fixture todos contra todos por zona más fechas interzonales, planteles
+y eventos por partido. Sirve para medir cómo escalan las vistas de la API.
+
+    DATABASE_URL=sqlite:///bench.db python bench/synthetic_league.py --competitions 4 --zones 3 --reset
+"""
+import argparse
+import os
+import random
+import string
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, engine
+from models import Base, Competition, Team, TeamDisplay, Player, Match, Event
+from services.schema_upgrade import upgrade_schema
+from services.standings_store import INTERZONAL, rebuild_standings
+
+SEASON = "2025"
+SEASON_START = datetime(2025, 3, 1, 16, 0)
+SQUAD_SIZE = 18
+# La primera es la competición principal que usan el dashboard y el calendario por defecto
+COMPETITION_NAMES = ["PRIMERA DIVISIÓN", "RESERVA", "SUB 17", "SUB 15", "SUB 13", "FEMENINO"]
+
+# Tipos de evento y su peso relativo (mismos nombres que manda COMET)
+EVENT_TYPES = [
+    ("Goal", 30), ("Penalty", 3), ("Own goal", 2),
+    ("Yellow card", 35), ("Red card", 5), ("Substitution", 25),
+]
+GOAL_EVENT_TYPES = {"Goal", "Penalty", "Own goal"}
+
+
+def round_robin(team_ids: list) -> list:
+    """
+    Fechas de un todos contra todos (método del círculo), alternando la localía.
+    """
+    teams = list(team_ids) + ([None] if len(team_ids) % 2 else [])
+    rounds = []
+    for r in range(len(teams) - 1):
+        pairs = [(teams[i], teams[-1 - i]) for i in range(len(teams) // 2)]
+        rounds.append([(home, away) if r % 2 == 0 else (away, home) for home, away in pairs if home and away])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+def build_fixture(zone_teams: dict, rounds: int = None, interzonal_rounds: int = 1) -> list:
+    """
+    Lista de fechas; cada fecha es una lista de (zona, local, visitante).
+    `rounds` fechas de zona (por defecto una rueda completa; si son más, se repiten con la
+    localía invertida) seguidas de `interzonal_rounds` fechas entre zonas vecinas.
+    """
+    zone_rounds = {zone: round_robin(team_ids) for zone, team_ids in zone_teams.items()}
+    total_zone_rounds = rounds if rounds is not None else max((len(r) for r in zone_rounds.values()), default=0)
+
+    fixture = []
+    for r in range(total_zone_rounds):
+        matchday = []
+        for zone, schedule in zone_rounds.items():
+            if not schedule:
+                continue
+            leg, index = divmod(r, len(schedule))
+            for home, away in schedule[index]:
+                matchday.append((zone, home, away) if leg % 2 == 0 else (zone, away, home))
+        fixture.append(matchday)
+
+    zones = list(zone_teams)
+    for r in range(interzonal_rounds):
+        matchday = []
+        for zone_a, zone_b in zip(zones[0::2], zones[1::2]):
+            teams_a, teams_b = zone_teams[zone_a], zone_teams[zone_b]
+            for k, home in enumerate(teams_a[:len(teams_b)]):
+                matchday.append((INTERZONAL, home, teams_b[(k + r) % len(teams_b)]))
+        fixture.append(matchday)
+    return fixture
+
+def _competition_name(index: int) -> str:
+    return COMPETITION_NAMES[index] if index < len(COMPETITION_NAMES) else f"DIVISIÓN {index + 1}"
+
+def _insert_returning(db: Session, model, rows: list, *columns) -> list:
+    if not rows:
+        return []
+    return db.execute(insert(model).returning(*columns), rows).all()
+
+def generate_league(db: Session, competitions: int = 2, zones: int = 2, teams_per_zone: int = 8, rounds: int = None,
+                    interzonal_rounds: int = 1, events_per_match: int = 8, played_ratio: float = 0.8, seed: int = 2025) -> dict:
+    """
+    Inserta la liga con INSERT masivos y reconstruye las tablas de posiciones.
+    Los IDs de COMET continúan desde los existentes, así que se puede llamar sobre una BD con datos.
+    No hace commit. Devuelve la cantidad de filas creadas por tabla.
+    """
+    rng = random.Random(seed)
+    event_names = [name for name, _ in EVENT_TYPES]
+    event_weights = [weight for _, weight in EVENT_TYPES]
+    next_team_uid = (db.query(func.max(Team.team_id_comet)).scalar() or 0) + 1
+    next_person_id = (db.query(func.max(Player.person_id)).scalar() or 0) + 1
+    next_match_uid = (db.query(func.max(Match.match_id_comet)).scalar() or 0) + 1
+    existing_competitions = db.query(func.count(Competition.id)).scalar()
+    totals = {"competitions": 0, "teams": 0, "players": 0, "matches": 0, "events": 0}
+    competition_ids = []
+
+    for c in range(competitions):
+        competition = Competition(name=_competition_name(existing_competitions + c), season=SEASON, category="PRIMERA", gender="MALE")
+        db.add(competition)
+        db.flush()
+        competition_ids.append(competition.id)
+
+        team_rows = []
+        for z in range(zones):
+            for t in range(teams_per_zone):
+                team_rows.append({"team_id_comet": next_team_uid, "name": f"Club {next_team_uid} ({competition.name})", "association": "Liga Sintética"})
+                next_team_uid += 1
+        team_ids = [team_id for (team_id,) in _insert_returning(db, Team, team_rows, Team.id)]
+        db.execute(insert(TeamDisplay), [
+            {"team_id": team_id, "display_name": f"Club {team_id}", "abbreviation": "".join(rng.choices(string.ascii_uppercase, k=3)), "shield_url": None}
+            for team_id in team_ids
+        ])
+        zone_teams = {
+            string.ascii_uppercase[z % 26] * (z // 26 + 1): team_ids[z * teams_per_zone:(z + 1) * teams_per_zone]
+            for z in range(zones)
+        }
+
+        player_rows = []
+        for team_id in team_ids:
+            for _ in range(SQUAD_SIZE):
+                player_rows.append({"person_id": next_person_id, "name": f"Jugador {next_person_id}", "team_id": team_id})
+                next_person_id += 1
+        squads = {}
+        for player_id, team_id in _insert_returning(db, Player, player_rows, Player.id, Player.team_id):
+            squads.setdefault(team_id, []).append(player_id)
+
+        fixture = build_fixture(zone_teams, rounds, interzonal_rounds)
+        played_rounds = round(len(fixture) * played_ratio)
+        match_rows = []
+        for r, matchday in enumerate(fixture):
+            for slot, (zone, home_id, away_id) in enumerate(matchday):
+                match_rows.append({
+                    "match_id_comet": next_match_uid,
+                    "competition_id": competition.id,
+                    "home_team_id": home_id,
+                    "away_team_id": away_id,
+                    "date": SEASON_START + timedelta(days=7 * r, hours=slot % 6),
+                    "status": "PLAYED" if r < played_rounds else "SCHEDULED",
+                    "facility": f"Cancha {home_id}",
+                    "round": f"Fecha {r + 1}",
+                    "zone": zone,
+                })
+                next_match_uid += 1
+        inserted_matches = _insert_returning(db, Match, match_rows, Match.id, Match.home_team_id, Match.away_team_id, Match.status)
+
+        event_rows = []
+        score_rows = []
+        for match_id, home_id, away_id, status in inserted_matches:
+            if status != "PLAYED":
+                continue
+            goals = {home_id: 0, away_id: 0}
+            used_keys = set()
+            for _ in range(events_per_match):
+                is_home = rng.random() < 0.5
+                team_id = home_id if is_home else away_id
+                event_type = rng.choices(event_names, event_weights)[0]
+                player_id = rng.choice(squads[team_id])
+                minute = rng.randint(1, 90)
+                phase = "FIRST_HALF" if minute <= 45 else "SECOND_HALF"
+                # Respeta la clave natural de eventos (uq_events_natural_key)
+                if (player_id, event_type, minute, phase) in used_keys:
+                    continue
+                used_keys.add((player_id, event_type, minute, phase))
+                if event_type in GOAL_EVENT_TYPES:
+                    goals[team_id] += 1
+                event_rows.append({
+                    "match_id": match_id,
+                    "player_id": player_id,
+                    "team_id": team_id,
+                    "event_type": event_type,
+                    "minute": minute,
+                    "phase": phase,
+                    "is_home": is_home,
+                    "second_player_id": rng.choice(squads[team_id]) if event_type == "Substitution" else None,
+                })
+            score_rows.append({"id": match_id, "home_score": goals[home_id], "away_score": goals[away_id]})
+        if event_rows:
+            db.execute(insert(Event), event_rows)
+        if score_rows:
+            db.execute(update(Match), score_rows)
+
+        totals["competitions"] += 1
+        totals["teams"] += len(team_ids)
+        totals["players"] += len(player_rows)
+        totals["matches"] += len(match_rows)
+        totals["events"] += len(event_rows)
+
+    totals["standings"] = rebuild_standings(db, competition_ids)
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga una liga sintética en la base de datos configurada (DATABASE_URL).")
+    parser.add_argument("--competitions", type=int, default=2, help="Competiciones (divisiones) a crear.")
+    parser.add_argument("--zones", type=int, default=2, help="Zonas por competición.")
+    parser.add_argument("--teams-per-zone", type=int, default=8, help="Equipos por zona.")
+    parser.add_argument("--rounds", type=int, default=None, help="Fechas de zona (por defecto, una rueda completa).")
+    parser.add_argument("--interzonal-rounds", type=int, default=1, help="Fechas interzonales al final de la fase de zonas.")
+    parser.add_argument("--events-per-match", type=int, default=8, help="Eventos por partido jugado.")
+    parser.add_argument("--played-ratio", type=float, default=0.8, help="Proporción de fechas ya jugadas.")
+    parser.add_argument("--seed", type=int, default=2025, help="Semilla de la generación.")
+    parser.add_argument("--reset", action="store_true", help="Borra y recrea todas las tablas antes de generar.")
+    args = parser.parse_args()
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        print("--- Generando liga sintética ---")
+        totals = generate_league(
+            db, args.competitions, args.zones, args.teams_per_zone, args.rounds,
+            args.interzonal_rounds, args.events_per_match, args.played_ratio, args.seed
+        )
+        db.commit()
+        print("✅ " + ", ".join(f"{count} {table}" for table, count in totals.items()))
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error generando la liga: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import create_engine, NullPool
+from sqlalchemy import create_engine, make_url, AsyncAdaptedQueuePool, NullPool, QueuePool, SingletonThreadPool, StaticPool
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 import os
+from uuid import uuid4
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -11,18 +13,118 @@ load_dotenv()
 # Definir la URL de la base de datos
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# --- POOL DE CONEXIONES (PostgreSQL) ---
+# DB_POOL_MODE:
+#   session     -> QueuePool con pre-ping y reciclado (conexión directa o pooler en modo sesión, puerto 5432)
+#   transaction -> igual, para PgBouncer en modo transacción (Supabase, puerto 6543): sin sentencias
+#                  preparadas del lado del servidor (psycopg2 no las usa; a psycopg 3 se le desactivan)
+#   null        -> NullPool: una conexión nueva por sesión (comportamiento anterior)
+# Si no se define, se deduce del puerto de la URL.
+# DB_POOL_SIZE y DB_MAX_OVERFLOW son el presupuesto total del proceso: en modo session se
+# reparte entre el motor síncrono y el async (DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW,
+# por defecto la mitad). En modo transaction el motor async no tiene pool propio (NullPool)
+# y el síncrono usa el presupuesto completo.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", str(DB_POOL_SIZE // 2)))
+DB_ASYNC_MAX_OVERFLOW = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", str(DB_MAX_OVERFLOW // 2)))
+DB_SYNC_POOL_SIZE, DB_SYNC_MAX_OVERFLOW = DB_POOL_SIZE, DB_MAX_OVERFLOW
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+def _default_pool_mode(url: str) -> str:
+    return "transaction" if make_url(url).port == 6543 else "session"
+
+def _is_memory_url(url) -> bool:
+    return make_url(url).query.get("mode") == "memory"
+
+def _shared_memory_url(url: str) -> str:
+    """
+    Una base SQLite en memoria (`sqlite://`) es privada de cada conexión, así que el motor
+    async vería otra base vacía: se reemplaza por una base en memoria con nombre y caché
+    compartida, visible desde ambos motores mientras quede alguna conexión abierta.
+    """
+    parsed = make_url(url)
+    if parsed.database not in (None, "", ":memory:"):
+        return url
+    return f"sqlite:///file:ligachajari_{uuid4().hex}?mode=memory&cache=shared&uri=true"
+
 # Crear el motor de base de datos
 if DATABASE_URL and DATABASE_URL.startswith("postgresql"):
-    # Usar NullPool para compatibilidad con PgBouncer (Supabase)
-    engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    DB_POOL_MODE = os.getenv("DB_POOL_MODE", "").lower() or _default_pool_mode(DATABASE_URL)
+    if DB_POOL_MODE == "null":
+        engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    elif DB_POOL_MODE in ("session", "transaction"):
+        connect_args = {}
+        if DB_POOL_MODE == "transaction" and make_url(DATABASE_URL).get_driver_name() == "psycopg":
+            connect_args["prepare_threshold"] = None
+        if DB_POOL_MODE == "session":
+            DB_SYNC_POOL_SIZE = max(1, DB_POOL_SIZE - DB_ASYNC_POOL_SIZE)
+            DB_SYNC_MAX_OVERFLOW = max(0, DB_MAX_OVERFLOW - DB_ASYNC_MAX_OVERFLOW)
+        engine = create_engine(
+            DATABASE_URL,
+            connect_args=connect_args,
+            poolclass=QueuePool,
+            pool_size=DB_SYNC_POOL_SIZE,
+            max_overflow=DB_SYNC_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True,
+        )
+    else:
+        raise ValueError(f"DB_POOL_MODE inválido: '{DB_POOL_MODE}' (usar session, transaction o null)")
 else:
-    print("ADVERTENCIA: No se encontró una DATABASE_URL de PostgreSQL. Usando SQLite local.")
-    DATABASE_URL = "sqlite:///ligachajari.db"
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    DB_POOL_MODE = "sqlite"
+    if not (DATABASE_URL and DATABASE_URL.startswith("sqlite")):
+        print("ADVERTENCIA: No se encontró una DATABASE_URL de PostgreSQL. Usando SQLite local.")
+        DATABASE_URL = "sqlite:///ligachajari.db"
+    DATABASE_URL = _shared_memory_url(DATABASE_URL)
+    sqlite_kwargs = {"poolclass": SingletonThreadPool} if _is_memory_url(DATABASE_URL) else {}
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, **sqlite_kwargs)
 
 # Crear una sesión local
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# --- MOTOR ASÍNCRONO (asyncpg / aiosqlite) ---
+# Misma base de datos que el motor síncrono, para las rutas async (ver el reparto del pool arriba).
+def _async_engine_args(url: str):
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # En memoria una única conexión compartida mantiene viva la base
+        return url.set(drivername="sqlite+aiosqlite"), {"poolclass": StaticPool} if _is_memory_url(url) else {}
+
+    connect_args = {}
+    query = dict(url.query)
+    # asyncpg no entiende sslmode (libpq): se traduce a su parámetro ssl
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    if DB_POOL_MODE == "transaction":
+        # PgBouncer en modo transacción no soporta sentencias preparadas con nombre: sin caché
+        # y con nombres únicos, para que dos clientes no choquen en la misma conexión del servidor
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+        query["prepared_statement_cache_size"] = "0"
+    url = url.set(drivername="postgresql+asyncpg", query=query)
+
+    kwargs = {"connect_args": connect_args}
+    if DB_POOL_MODE in ("null", "transaction"):
+        # En modo transacción el pool lo hace PgBouncer
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(
+            pool_size=max(1, DB_ASYNC_POOL_SIZE),
+            max_overflow=DB_ASYNC_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=True,
+        )
+    return url, kwargs
+
+_async_url, _async_kwargs = _async_engine_args(DATABASE_URL)
+async_engine = create_async_engine(_async_url, **_async_kwargs)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base para los modelos
 Base = declarative_base()
 
@@ -35,3 +137,34 @@ def get_db():
         yield db
     finally:
         db.close()  
+
+async def get_async_db():
+    """
+    Dependencia para FastAPI: crea una sesión asíncrona de base de datos
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def pool_status() -> dict:
+    """
+    Métricas del pool de conexiones para el health check.
+    """
+    pool = engine.pool
+    status = {"mode": DB_POOL_MODE, "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": DB_SYNC_MAX_OVERFLOW,
+        })
+    async_pool = async_engine.pool
+    status["async_pool_class"] = type(async_pool).__name__
+    if isinstance(async_pool, AsyncAdaptedQueuePool):
+        status.update({
+            "async_size": async_pool.size(),
+            "async_checked_out": async_pool.checkedout(),
+            "async_overflow": max(async_pool.overflow(), 0),
+        })
+    return status
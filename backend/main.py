@@ -1,13 +1,16 @@
-from fastapi import FastAPI,Depends
+from fastapi import FastAPI,HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from database import SessionLocal, engine
+from database import SessionLocal, engine, async_engine, pool_status
 import models
 from models import Base
-from services.sync_service import run_final_sync
+from services.sync_jobs import SyncAlreadyRunning, get_running_sync_job, get_sync_job, start_sync_job
+from services.schema_upgrade import upgrade_schema
+from services.league_snapshot import refresh_league_snapshot
+from services.dashboard_service import refresh_dashboard_document
+from services.request_metrics import RequestMetricsMiddleware, TimedJSONResponse, instrument_engine
 from api import standings, matches, match_detail, top_scorers, stats, admin, competitions, matches_with_stats, zonal_stats, zones, players, calendar, dashboard
 
-app =FastAPI(title="Liga Chajarí by Nep - API")
+app =FastAPI(title="Liga Chajarí by Nep - API", default_response_class=TimedJSONResponse)
 
 #Configurar CORS
 app.add_middleware(
@@ -20,11 +23,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # El frontend lee el cursor de la página siguiente de /api/matches
+    expose_headers=["X-Next-Cursor"],
 )
 
+#Métricas por petición: consultas SQL, tiempo de BD y serialización (header Server-Timing y log JSON)
+app.add_middleware(RequestMetricsMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 #Crear tablas
 Base.metadata.create_all(bind=engine)
 
+#Agregar columnas e índices nuevos en tablas que ya existían (create_all no los agrega)
+upgrade_schema(engine)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -32,18 +45,51 @@ def get_db():
     finally:
         db.close()
 
-@app.post("/api/sync-data")
-def sync_data(db: Session = Depends(get_db)):
-    print("🚀 Ejecutando Sincronización Final...")
-    run_final_sync()
+def _publish_sync_results():
+    # Publicar la nueva foto de la liga y el dashboard precalculado al terminar la sincronización
+    refresh_league_snapshot()
+    refresh_dashboard_document()
+
+@app.post("/api/sync-data", status_code=202)
+def sync_data(incremental: bool = False):
+    """
+    Lanza la Sincronización Final en segundo plano y devuelve el id del trabajo.
+    Solo puede haber una sincronización en curso (también entre procesos).
+    `incremental=true` omite las páginas de COMET que no cambiaron desde la última sincronización.
+    """
+    try:
+        job = start_sync_job(incremental=incremental, on_finish=_publish_sync_results)
+    except SyncAlreadyRunning:
+        running = get_running_sync_job()
+        raise HTTPException(status_code=409, detail={
+            "message": "Ya hay una sincronización en curso.",
+            "job_id": running.id if running else None
+        })
+    print(f"🚀 Ejecutando Sincronización Final en segundo plano (trabajo {job.id})...")
     return {
-        "status": "success",
+        "status": "accepted",
+        "job_id": job.id,
         "message": "Sincronización Final iniciada."
     }
 
+@app.get("/api/sync-jobs/{job_id}")
+def get_sync_job_status(job_id: str):
+    """
+    Estado y avance por paso (zonas, eventos, marcadores) de un trabajo de sincronización.
+    """
+    job = get_sync_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo de sincronización no encontrado")
+    return job.to_dict()
+
+@app.on_event("startup")
+def build_league_snapshot():
+    refresh_league_snapshot()
+    refresh_dashboard_document()
+
 @app.get("/healthz")
 def health_check():
-    return{"status": "ok"}
+    return{"status": "ok", "db_pool": pool_status()}
 
 @app.get("/")
 def home():
@@ -61,4 +107,5 @@ app.include_router(zonal_stats.router)
 app.include_router(zones.router)
 app.include_router(players.router)
 app.include_router(calendar.router)
-app.include_router(dashboard.router)
\ No newline at end of file
+app.include_router(dashboard.router)
+app.include_router(admin.router)
\ No newline at end of file
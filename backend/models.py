@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, UniqueConstraint, Index, func
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -54,7 +54,7 @@ class Match(Base):
     competition_id = Column(Integer, ForeignKey("competitions.id"))
     home_team_id = Column(Integer, ForeignKey("teams.id"))
     away_team_id = Column(Integer, ForeignKey("teams.id"))
-    date = Column(DateTime)
+    date = Column(DateTime, index=True)
     status = Column(String)
     facility = Column(String)
     referee_id = Column(Integer, ForeignKey("referees.id"))
@@ -62,6 +62,7 @@ class Match(Base):
     zone = Column(String, nullable=True, index=True)
     home_score = Column(Integer, nullable=True)
     away_score = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     competition = relationship("Competition")
     home_team = relationship("Team", foreign_keys=[home_team_id])
@@ -70,6 +71,10 @@ class Match(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    # Clave natural usada por la sincronización para detectar eventos ya existentes
+    __table_args__ = (
+        UniqueConstraint("match_id", "player_id", "event_type", "minute", "phase", name="uq_events_natural_key"),
+    )
     id = Column(Integer, primary_key=True)
     match_id = Column(Integer, ForeignKey("matches.id"))
     player_id = Column(Integer, ForeignKey("players.id"))
@@ -82,14 +87,52 @@ class Event(Base):
     second_player_id = Column(Integer, nullable=True)
     accumulated_yellow = Column(String, nullable=True)
     stoppage_time = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     match = relationship("Match")
     player = relationship("Player")
     team = relationship("Team")
 
+# Índice funcional para los filtros case-insensitive por tipo de evento (goleadores, tarjetas)
+Index("ix_events_event_type_lower", func.lower(Event.event_type))
+
+# Tabla de posiciones materializada por competición, zona ("" = tabla general) y equipo
+class Standing(Base):
+    __tablename__ = "standings"
+    __table_args__ = (
+        UniqueConstraint("competition_id", "zone", "team_id", name="uq_standings_competition_zone_team"),
+    )
+    id = Column(Integer, primary_key=True)
+    competition_id = Column(Integer, ForeignKey("competitions.id"), nullable=False)
+    zone = Column(String, nullable=False, default="")
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    played = Column(Integer, nullable=False, default=0)
+    won = Column(Integer, nullable=False, default=0)
+    drawn = Column(Integer, nullable=False, default=0)
+    lost = Column(Integer, nullable=False, default=0)
+    goals_for = Column(Integer, nullable=False, default=0)
+    goals_against = Column(Integer, nullable=False, default=0)
+    points = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    team = relationship("Team")
+
 # Clase faltante añadida para el registro de sincronizaciones
 class SyncLog(Base):
     __tablename__ = 'sync_log'
     id = Column(Integer, primary_key=True)
     sync_date = Column(DateTime, nullable=False, default=datetime.utcnow)
-    records_processed = Column(Integer, nullable=False, default=0)
\ No newline at end of file
+    records_processed = Column(Integer, nullable=False, default=0)
+
+# Punto de control por página de cada reporte de COMET (sincronización incremental)
+class SyncCheckpoint(Base):
+    __tablename__ = "sync_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("report_id", "page", name="uq_sync_checkpoints_report_page"),
+    )
+    id = Column(Integer, primary_key=True)
+    report_id = Column(Integer, nullable=False, index=True)
+    page = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    synced_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,41 @@
+import argparse
+import os
+import sys
+
+# Añadir el directorio actual al path para asegurar que los módulos internos se encuentren
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from database import SessionLocal, engine
+from models import Base
+from services.cache import bump_generation
+from services.standings_store import rebuild_standings
+
+def main():
+    """
+    Reconstruye desde cero la tabla materializada de posiciones (tabla general y por zona).
+    """
+    parser = argparse.ArgumentParser(description="Reconstruye la tabla materializada de posiciones.")
+    parser.add_argument(
+        "--competition-id",
+        type=int,
+        action="append",
+        help="ID de la competición a reconstruir. Se puede repetir. Por defecto se reconstruyen todas."
+    )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print("--- Reconstruyendo tablas de posiciones ---")
+        total_rows = rebuild_standings(db, args.competition_id)
+        db.commit()
+        bump_generation()
+        print(f"✅ Se generaron {total_rows} filas de posiciones.")
+    except Exception as e:
+        print(f"\n❌ Ocurrió un error inesperado: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,10 @@ import sys
 # Añadir el directorio actual al path para asegurar que los módulos internos se encuentren
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from database import engine
+from services.schema_upgrade import upgrade_schema
 from services.sync_service import run_final_sync
+from services.sync_jobs import SyncAlreadyRunning, SyncLock
 
 def main():
     """
@@ -27,15 +30,29 @@ def main():
 '''
     )
 
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Omite las páginas de cada reporte cuyo contenido no cambió desde la última sincronización."
+    )
+
     args = parser.parse_args()
 
     print(f"\n--- INICIANDO SCRIPT DE SINCRONIZACIÓN ---")
     print(f"ID de Reporte de Zonas seleccionado: {args.report_id}")
+    print(f"Modo: {'incremental' if args.incremental else 'completo'}")
     print("-----------------------------------------")
     
     try:
-        run_final_sync(zones_report_id=args.report_id)
+        # Mismo candado que la API: nunca dos sincronizaciones a la vez
+        with SyncLock():
+            # La sincronización cuenta con las restricciones únicas (ON CONFLICT) de las tablas
+            upgrade_schema(engine)
+            run_final_sync(zones_report_id=args.report_id, incremental=args.incremental)
         print("\n--- SCRIPT DE SINCRONIZACIÓN FINALIZADO ---")
+    except SyncAlreadyRunning:
+        print("\n⚠️  Ya hay una sincronización en curso. Intenta de nuevo cuando termine.")
+        sys.exit(1)
     except Exception as e:
         print(f"\n--- ❌ OCURRIÓ UN ERROR INESPERADO DURANTE LA EJECUCIÓN ---")
         print(f"{e}")
@@ -0,0 +1,208 @@
+# backend/services/cache.py
+import hashlib
+import json
+import os
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from services.request_metrics import record_serialization
+
+# --- CONFIGURACIÓN ---
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+
+# --- GENERACIÓN DE DATOS ---
+# Se incrementa cada vez que una sincronización o reparación modifica la BD.
+# Todo lo cacheado con una generación anterior se considera inválido.
+_generation = 0
+_generation_lock = threading.Lock()
+
+def current_generation() -> int:
+    return _generation
+
+def bump_generation() -> int:
+    global _generation
+    with _generation_lock:
+        _generation += 1
+    response_cache.clear()
+    return _generation
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "generation", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, generation: int, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.generation = generation
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Caché LRU con TTL de respuestas JSON ya serializadas, invalidada por generación.
+    """
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._async_key_locks = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.generation != _generation or entry.expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, body: bytes, generation: int) -> CacheEntry:
+        etag = f'"{generation}-{hashlib.sha1(body).hexdigest()[:20]}"'
+        entry = CacheEntry(body, etag, generation, time.monotonic() + self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def key_lock(self, key) -> threading.Lock:
+        """
+        Un lock por clave para que un pico de tráfico no recalcule la misma respuesta en paralelo.
+        Se descarta con discard_key_lock al terminar el cálculo, así solo quedan los de claves en uso.
+        """
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def discard_key_lock(self, key, lock):
+        with self._lock:
+            if self._key_locks.get(key) is lock:
+                del self._key_locks[key]
+
+    def async_key_lock(self, key) -> asyncio.Lock:
+        with self._lock:
+            lock = self._async_key_locks.get(key)
+            if lock is None:
+                lock = self._async_key_locks[key] = asyncio.Lock()
+            return lock
+
+    def discard_async_key_lock(self, key, lock):
+        with self._lock:
+            if self._async_key_locks.get(key) is lock:
+                del self._async_key_locks[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self._async_key_locks.clear()
+
+
+response_cache = ResponseCache()
+
+
+class GenerationCache:
+    """
+    Valores calculados por clave (ej: estructuras por competición) que valen hasta el
+    próximo cambio de generación o hasta vencer el TTL (los syncs por CLI corren en otro
+    proceso y no cambian la generación de este).
+    El cálculo corre fuera del lock (puede consultar la BD y se usa desde rutas async vía
+    run_sync): dos llamadas simultáneas pueden calcular lo mismo, y solo se publica el
+    resultado si la generación no cambió mientras tanto.
+    """
+    def __init__(self, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        generation = _generation
+        cached = self._values.get(key)
+        if cached is not None and cached[0] == generation and cached[1] > time.monotonic():
+            return cached[2]
+        value = compute()
+        with self._lock:
+            if generation == _generation:
+                now = time.monotonic()
+                for stale in [k for k, (gen, expires_at, _) in self._values.items() if gen != generation or expires_at <= now]:
+                    del self._values[stale]
+                self._values[key] = (generation, now + self.ttl_seconds, value)
+        return value
+
+
+def _request_cache_key(request: Request):
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())))
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def serialize_json(data) -> bytes:
+    start = time.perf_counter()
+    body = json.dumps(jsonable_encoder(data), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    record_serialization(time.perf_counter() - start)
+    return body
+
+def get_or_compute(key, compute) -> CacheEntry:
+    entry = response_cache.get(key)
+    if entry is not None:
+        return entry
+    lock = response_cache.key_lock(key)
+    try:
+        with lock:
+            entry = response_cache.get(key)
+            if entry is None:
+                generation = _generation
+                entry = response_cache.set(key, serialize_json(compute()), generation)
+    finally:
+        # Quien llegue después encuentra la respuesta en la caché (o crea un lock nuevo)
+        response_cache.discard_key_lock(key, lock)
+    return entry
+
+async def get_or_compute_async(key, compute) -> CacheEntry:
+    entry = response_cache.get(key)
+    if entry is not None:
+        return entry
+    lock = response_cache.async_key_lock(key)
+    try:
+        async with lock:
+            entry = response_cache.get(key)
+            if entry is None:
+                generation = _generation
+                entry = response_cache.set(key, serialize_json(await compute()), generation)
+    finally:
+        response_cache.discard_async_key_lock(key, lock)
+    return entry
+
+def _json_response(request: Request, entry: CacheEntry) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+def cached_json_response(request: Request, compute) -> Response:
+    """
+    Devuelve la respuesta cacheada para la ruta y parámetros de la petición, calculándola
+    con `compute()` si no existe. Responde 304 si el cliente ya tiene la versión vigente.
+    """
+    return _json_response(request, get_or_compute(_request_cache_key(request), compute))
+
+async def cached_json_response_async(request: Request, compute) -> Response:
+    """
+    Igual que cached_json_response, para rutas async: `compute` es una corrutina.
+    """
+    return _json_response(request, await get_or_compute_async(_request_cache_key(request), compute))
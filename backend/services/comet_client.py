@@ -0,0 +1,249 @@
+# backend/services/comet_client.py
+import codecs
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURACIÓN ---
+BASE_URL = os.getenv("COMET_REPORTS_URL", "https://latam.analyticom.de/data-backend/api/public/areports/run")
+PAGE_SIZE = 999
+MAX_WORKERS = int(os.getenv("COMET_MAX_WORKERS", "4"))
+REQUESTS_PER_SECOND = float(os.getenv("COMET_REQUESTS_PER_SECOND", "4"))
+MAX_RETRIES = int(os.getenv("COMET_MAX_RETRIES", "3"))
+BACKOFF_SECONDS = float(os.getenv("COMET_BACKOFF_SECONDS", "1"))
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Bytes leídos por vez al decodificar una página en streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class RateLimiter:
+    """
+    Limita la cantidad de peticiones por segundo que se inician con una misma API Key.
+    """
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def _get_rate_limiter(api_key: str) -> RateLimiter:
+    with _rate_limiters_lock:
+        if api_key not in _rate_limiters:
+            _rate_limiters[api_key] = RateLimiter(REQUESTS_PER_SECOND)
+        return _rate_limiters[api_key]
+
+def _backoff_delay(attempt: int, response=None) -> float:
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return BACKOFF_SECONDS * (2 ** attempt) + random.uniform(0, BACKOFF_SECONDS)
+
+def _request_report_page(template_id: int, page: int, api_key: str, page_size: int, timeout: int, stream: bool):
+    url = f"{BASE_URL}/{template_id}/{page}/{page_size}/?API_KEY={api_key}"
+    limiter = _get_rate_limiter(api_key)
+    attempt = 0
+    while True:
+        limiter.wait()
+        try:
+            response = requests.get(url, timeout=timeout, stream=stream)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= MAX_RETRIES: raise
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+            response.close()
+            time.sleep(_backoff_delay(attempt, response))
+            attempt += 1
+            continue
+
+        response.raise_for_status()
+        return response
+
+def fetch_report_page(template_id: int, page: int, api_key: str, page_size: int = PAGE_SIZE, timeout: int = 30) -> dict:
+    """
+    Descarga una página de un reporte de COMET respetando el límite de la API Key.
+    Reintenta con backoff exponencial ante errores de red, 429 y 5xx.
+    """
+    return _request_report_page(template_id, page, api_key, page_size, timeout, stream=False).json()
+
+def iter_report_pages(template_id: int, api_key: str, start_page: int = 0, max_workers: int = MAX_WORKERS):
+    """
+    Genera (página, datos) en orden para todas las páginas de un reporte.
+    La primera página se descarga sola para conocer `lastPage`; el resto se descarga
+    en paralelo con a lo sumo `max_workers * 2` páginas en vuelo, de modo que el
+    consumidor puede ir escribiendo en la BD mientras llegan las siguientes.
+    """
+    first = fetch_report_page(template_id, start_page, api_key)
+    if not first.get("results"):
+        return
+    yield start_page, first
+
+    last_page = first.get("lastPage", 0)
+    if start_page >= last_page:
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    pending = deque()
+    next_page = start_page + 1
+    try:
+        while next_page <= last_page or pending:
+            while next_page <= last_page and len(pending) < max(1, max_workers) * 2:
+                pending.append((next_page, executor.submit(fetch_report_page, template_id, next_page, api_key)))
+                next_page += 1
+
+            page, future = pending.popleft()
+            data = future.result()
+            if not data.get("results"):
+                return
+            yield page, data
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# --- DECODIFICACIÓN EN STREAMING ---
+class _JSONStream:
+    """
+    Lector incremental de JSON sobre bloques de texto: decodifica un valor por vez con
+    JSONDecoder.raw_decode, guardando en memoria solo el bloque actual.
+    """
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer = self._buffer[self._pos:] + chunk
+                self._pos = 0
+                return True
+        self._eof = True
+        return False
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("JSON incompleto en la respuesta de COMET")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Se esperaba '{char}' en la respuesta de COMET")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # Un número al final del bloque puede continuar en el siguiente
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+def iter_report_json(chunks, metadata: dict):
+    """
+    Genera las filas de `results` de un reporte a medida que se decodifican.
+    El resto de las claves (lastPage, reportName...) se guardan en `metadata`.
+    """
+    stream = _JSONStream(chunks)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key == "results" and stream.peek() == "[":
+            stream.expect("[")
+            if stream.peek() != "]":
+                while True:
+                    yield stream.value()
+                    if stream.peek() != ",":
+                        break
+                    stream.expect(",")
+            stream.expect("]")
+        else:
+            metadata[key] = stream.value()
+        if stream.peek() != ",":
+            break
+        stream.expect(",")
+    stream.expect("}")
+
+def stream_report_page(template_id: int, page: int, api_key: str, metadata: dict, page_size: int = PAGE_SIZE, timeout: int = 30):
+    """
+    Como fetch_report_page, pero genera las filas mientras se lee el cuerpo de la respuesta
+    en vez de decodificar la página entera. `metadata` recibe lastPage y las demás claves.
+    """
+    response = _request_report_page(template_id, page, api_key, page_size, timeout, stream=True)
+    with response:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        chunks = (decoder.decode(chunk) for chunk in response.iter_content(STREAM_CHUNK_SIZE))
+        yield from iter_report_json(chunks, metadata)
+
+def iter_report_rows(template_id: int, api_key: str, start_page: int = 0, row_filter=None, metadata: dict = None):
+    """
+    Genera (página, fila) para todo el reporte, página por página y fila por fila, con
+    memoria constante. `row_filter` descarta filas apenas se decodifican.
+    `metadata`, si se pasa, recibe las claves de la página en curso (reportName, lastPage...)
+    a medida que se leen: las que COMET manda antes de `results` ya están con la primera fila.
+    """
+    if metadata is None:
+        metadata = {}
+    page = start_page
+    while True:
+        metadata.clear()
+        received = 0
+        for row in stream_report_page(template_id, page, api_key, metadata):
+            received += 1
+            if row_filter is None or row_filter(row):
+                yield page, row
+        if not received or page >= metadata.get("lastPage", 0):
+            return
+        page += 1
+
+def iter_batches(items, batch_size: int):
+    """
+    Agrupa un iterable en listas de a lo sumo `batch_size` elementos.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,113 @@
+# backend/services/dashboard_service.py
+import asyncio
+import threading
+import time
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from database import SessionLocal, AsyncSessionLocal
+from services.cache import current_generation
+from services.league_snapshot import SNAPSHOT_TTL_SECONDS, LeagueSnapshot, get_league_snapshot
+from services.standings_service import calculate_standings_with_recent_results
+from services.top_scorers_service import get_top_scorers
+
+DASHBOARD_TOP_N = 5
+
+EMPTY_DASHBOARD = {
+    "top_5_standings": [],
+    "top_scorers": [],
+    "last_round_matches": []
+}
+
+# --- PIEZAS DEL DASHBOARD (independientes entre sí) ---
+
+def top_standings(db: Session, competition_id: int) -> list:
+    standings_data = calculate_standings_with_recent_results(db, competition_id)
+    return standings_data[:DASHBOARD_TOP_N] if isinstance(standings_data, list) else []
+
+def top_scorers(db: Session, competition_id: int) -> list:
+    return get_top_scorers(db, competition_id, limit=DASHBOARD_TOP_N)
+
+def last_round_matches(snapshot: LeagueSnapshot, competition_id: int) -> list:
+    """
+    Partidos de la última jornada disputada, desde la foto en memoria.
+    """
+    latest_round_name = snapshot.latest_played_round(competition_id)
+    if not latest_round_name:
+        return []
+    matches = sorted(snapshot.matches_by_round.get((competition_id, latest_round_name), ()), key=lambda m: m.id)
+    return [
+        {
+            "id": match.match_id_comet,
+            "home_team_name": snapshot.teams[match.home_team_id].name,
+            "away_team_name": snapshot.teams[match.away_team_id].name,
+            "home_score": match.home_score,
+            "away_score": match.away_score,
+        }
+        for match in matches
+    ]
+
+# --- ARMADO ---
+
+def build_dashboard_data(db: Session, snapshot: LeagueSnapshot) -> dict:
+    """
+    Armado secuencial sobre una sola sesión (usado para precalcular tras una sincronización).
+    """
+    competition = snapshot.find_competition()
+    if not competition:
+        return dict(EMPTY_DASHBOARD)
+    return jsonable_encoder({
+        "top_5_standings": top_standings(db, competition.id),
+        "top_scorers": top_scorers(db, competition.id),
+        "last_round_matches": last_round_matches(snapshot, competition.id)
+    })
+
+async def _run_in_new_session(fn, *args):
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(fn, *args)
+
+async def build_dashboard_data_async(snapshot: LeagueSnapshot) -> dict:
+    """
+    Armado en paralelo: tabla y goleadores en conexiones separadas, última jornada desde la foto.
+    """
+    competition = snapshot.find_competition()
+    if not competition:
+        return dict(EMPTY_DASHBOARD)
+    standings_data, scorers_data = await asyncio.gather(
+        _run_in_new_session(top_standings, competition.id),
+        _run_in_new_session(top_scorers, competition.id),
+    )
+    return jsonable_encoder({
+        "top_5_standings": standings_data,
+        "top_scorers": scorers_data,
+        "last_round_matches": last_round_matches(snapshot, competition.id)
+    })
+
+# --- DOCUMENTO PRECALCULADO ---
+# Se regenera al terminar cada sincronización; vale mientras no cambie la generación y,
+# como la foto de la liga, hasta LEAGUE_SNAPSHOT_TTL_SECONDS (los syncs por CLI corren en
+# otro proceso y no cambian la generación de este).
+_document = None
+_document_lock = threading.Lock()
+
+def get_dashboard_document():
+    document = _document
+    if document is not None and document[0] == current_generation() \
+            and time.monotonic() - document[1] < SNAPSHOT_TTL_SECONDS:
+        return document[2]
+    return None
+
+def store_dashboard_document(data: dict, generation: int):
+    global _document
+    with _document_lock:
+        if _document is None or _document[0] <= generation:
+            _document = (generation, time.monotonic(), data)
+
+def refresh_dashboard_document() -> dict:
+    """
+    Recalcula y publica el documento del dashboard con la generación actual.
+    """
+    generation = current_generation()
+    with SessionLocal() as db:
+        data = build_dashboard_data(db, get_league_snapshot(db))
+    store_dashboard_document(data, generation)
+    return data
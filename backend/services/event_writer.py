@@ -0,0 +1,115 @@
+# backend/services/event_writer.py
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import Event
+
+# Campos que identifican un evento (ver uq_events_natural_key en models.Event)
+EVENT_KEY_FIELDS = ("match_id", "player_id", "event_type", "minute", "phase")
+QUERY_CHUNK_SIZE = 500
+
+def sanitize_minute(value):
+    """
+    Minuto como entero (COMET lo manda como texto); None si no es un número.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+def sanitize_phase(value):
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+def normalize_event(values: dict) -> dict:
+    """
+    Copia del evento con los campos de la clave con el mismo tipo que en la BD.
+    """
+    return {**values, "minute": sanitize_minute(values.get("minute")), "phase": sanitize_phase(values.get("phase"))}
+
+def event_key(values: dict) -> tuple:
+    return (
+        values.get("match_id"),
+        values.get("player_id"),
+        values.get("event_type"),
+        sanitize_minute(values.get("minute")),
+        sanitize_phase(values.get("phase")),
+    )
+
+def _insert_statement(db: Session):
+    """
+    INSERT ... ON CONFLICT DO NOTHING RETURNING (solo devuelve las filas que se insertaron)
+    en PostgreSQL y SQLite; INSERT simple en otros motores.
+    """
+    dialect = db.get_bind().dialect.name
+    returning = [Event.id] + [getattr(Event, field) for field in EVENT_KEY_FIELDS]
+    if dialect == "postgresql":
+        return postgresql.insert(Event).on_conflict_do_nothing().returning(*returning)
+    if dialect == "sqlite":
+        return sqlite.insert(Event).on_conflict_do_nothing().returning(*returning)
+    return Event.__table__.insert()
+
+class EventUpserter:
+    """
+    Escribe eventos por lotes. Carga una sola vez las claves naturales existentes de cada
+    partido afectado, compara en memoria y escribe cada lote con un INSERT y un UPDATE masivos.
+    """
+    def __init__(self, db: Session, update_fields: tuple = ()):
+        self.db = db
+        self.update_fields = update_fields
+        self.existing = {}  # clave natural -> {"id": ..., campos actualizables}
+        self.loaded_match_ids = set()
+
+    def _load_existing(self, match_ids: set):
+        missing = list(match_ids - self.loaded_match_ids)
+        columns = [Event.id] + [getattr(Event, field) for field in EVENT_KEY_FIELDS + self.update_fields]
+        for i in range(0, len(missing), QUERY_CHUNK_SIZE):
+            chunk = missing[i:i + QUERY_CHUNK_SIZE]
+            for row in self.db.query(*columns).filter(Event.match_id.in_(chunk)):
+                values = row._asdict()
+                self.existing[event_key(values)] = values
+        self.loaded_match_ids.update(missing)
+
+    def upsert(self, event_rows: list) -> tuple:
+        """
+        Inserta los eventos nuevos y actualiza `update_fields` de los existentes.
+        Los minutos y fases se normalizan antes de comparar (ver normalize_event).
+        Devuelve (eventos realmente insertados, cantidad de eventos actualizados).
+        """
+        if not event_rows:
+            return [], 0
+        self._load_existing({row["match_id"] for row in event_rows})
+
+        to_insert = []
+        to_update = []
+        for row in map(normalize_event, event_rows):
+            key = event_key(row)
+            current = self.existing.get(key)
+            if current is None:
+                to_insert.append(row)
+                self.existing[key] = dict(row)
+                continue
+            changes = {field: row[field] for field in self.update_fields if field in row and current.get(field) != row[field]}
+            if changes and current.get("id") is not None:
+                to_update.append({"id": current["id"], **changes})
+                current.update(changes)
+
+        inserted = []
+        if to_insert:
+            statement = _insert_statement(self.db)
+            result = self.db.execute(statement, to_insert)
+            if isinstance(statement, (postgresql.Insert, sqlite.Insert)):
+                # Las filas que chocaron con la clave única (ON CONFLICT DO NOTHING) no vuelven
+                ids = {event_key(r._asdict()): r.id for r in result}
+                for row in to_insert:
+                    key = event_key(row)
+                    if key in ids:
+                        self.existing[key]["id"] = ids[key]
+                        inserted.append(row)
+            else:
+                inserted = to_insert
+        if to_update:
+            self.db.execute(update(Event), to_update)
+        return inserted, len(to_update)
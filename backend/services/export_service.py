@@ -0,0 +1,136 @@
+# backend/services/export_service.py
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from sqlalchemy import or_, select, union
+from database import SessionLocal
+from models import Match, Team, Event
+
+# Filas por lote leídas del cursor del servidor (y escritas por bloque de respuesta)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "json": "application/json",
+}
+
+EXPORT_MODELS = {
+    "matches": Match,
+    "teams": Team,
+    "events": Event,
+}
+
+# Entidades con columna updated_at (la de equipos se serializa tal cual en otras respuestas)
+EXPORT_UPDATED_SINCE = {"matches", "events"}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def build_export_query(entity: str, competition_id: int = None, date_from: datetime = None,
+                       date_to: datetime = None, updated_since: datetime = None):
+    """
+    SELECT de columnas planas (sin objetos ORM) de la entidad, con los filtros opcionales.
+    Las fechas filtran por la fecha del partido; en equipos solo aplica la competición.
+    `updated_since` solo existe para partidos y eventos (ver EXPORT_UPDATED_SINCE).
+    """
+    model = EXPORT_MODELS[entity]
+    query = select(*model.__table__.columns).order_by(model.id)
+
+    if entity == "matches":
+        if competition_id is not None:
+            query = query.where(Match.competition_id == competition_id)
+        if date_from is not None:
+            query = query.where(Match.date >= date_from)
+        if date_to is not None:
+            query = query.where(Match.date < date_to)
+    elif entity == "events":
+        if competition_id is not None or date_from is not None or date_to is not None:
+            match_ids = select(Match.id)
+            if competition_id is not None:
+                match_ids = match_ids.where(Match.competition_id == competition_id)
+            if date_from is not None:
+                match_ids = match_ids.where(Match.date >= date_from)
+            if date_to is not None:
+                match_ids = match_ids.where(Match.date < date_to)
+            query = query.where(Event.match_id.in_(match_ids))
+    elif entity == "teams" and competition_id is not None:
+        team_ids = union(
+            select(Match.home_team_id).where(Match.competition_id == competition_id),
+            select(Match.away_team_id).where(Match.competition_id == competition_id)
+        ).subquery()
+        query = query.where(Team.id.in_(select(team_ids.c[0])))
+
+    if updated_since is not None:
+        # Las filas anteriores a la columna updated_at no tienen fecha: se incluyen siempre
+        query = query.where(or_(model.updated_at >= updated_since, model.updated_at.is_(None)))
+    return query
+
+def iter_export_rows(query, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Recorre la consulta con un cursor del lado del servidor, de a `batch_size` filas.
+    Usa su propia sesión para que siga abierta mientras se transmite la respuesta.
+    """
+    with SessionLocal() as db:
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        columns = list(result.keys())
+        yield columns
+        for partition in result.partitions():
+            yield partition
+
+def iter_encoded(rows, export_format: str):
+    """
+    Convierte los lotes de filas en bloques de texto NDJSON, CSV o un array JSON.
+    """
+    columns = next(rows)
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for partition in rows:
+            writer.writerows([[_csv_value(value) for value in row] for row in partition])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    first = True
+    if export_format == "json":
+        yield "["
+    for partition in rows:
+        lines = [json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) for row in partition]
+        if export_format == "json":
+            yield ("" if first else ",") + ",".join(lines)
+        else:
+            yield "".join(line + "\n" for line in lines)
+        first = False
+    if export_format == "json":
+        yield "]"
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def iter_gzip(chunks):
+    """
+    Comprime al vuelo un flujo de bloques de texto en formato gzip.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_export(entity: str, export_format: str, compress: bool = False, **filters):
+    chunks = iter_encoded(iter_export_rows(build_export_query(entity, **filters)), export_format)
+    if compress:
+        return iter_gzip(chunks)
+    return (chunk.encode("utf-8") for chunk in chunks)
@@ -0,0 +1,177 @@
+# backend/services/league_snapshot.py
+import asyncio
+import os
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import SessionLocal
+from models import Competition, Team, Player, Match, Event
+from services.cache import current_generation
+
+# --- CONFIGURACIÓN ---
+# Tope de antigüedad para procesos que no ven el cambio de generación (ej: sync por CLI)
+SNAPSHOT_TTL_SECONDS = float(os.getenv("LEAGUE_SNAPSHOT_TTL_SECONDS", "600"))
+
+MAIN_COMPETITION_NAME = "PRIMERA DIVISIÓN"
+MAIN_COMPETITION_SEASON = "2025"
+
+
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+class CompetitionRecord(_Record):
+    __slots__ = ("id", "name", "season")
+
+class TeamRecord(_Record):
+    __slots__ = ("id", "team_id_comet", "name")
+
+class PlayerRecord(_Record):
+    __slots__ = ("id", "name", "team_id")
+
+class MatchRecord(_Record):
+    __slots__ = ("id", "match_id_comet", "competition_id", "home_team_id", "away_team_id", "date",
+                 "status", "facility", "round", "zone", "home_score", "away_score")
+
+class EventRecord(_Record):
+    __slots__ = ("id", "match_id", "player_id", "team_id", "event_type", "sub_type", "minute", "phase",
+                 "is_home", "second_player_id", "accumulated_yellow", "stoppage_time")
+
+def _load(db: Session, record_class, model):
+    columns = [getattr(model, name) for name in record_class.__slots__]
+    return [record_class(*row) for row in db.query(*columns).order_by(model.id)]
+
+# Mismo orden que ORDER BY ... , id en PostgreSQL (producción): los NULL van al final
+def _match_order(match: MatchRecord):
+    return (match.date is None, match.date or 0, match.id)
+
+def _event_order(event: EventRecord):
+    return (event.minute is None, event.minute or 0, event.id)
+
+
+class LeagueSnapshot:
+    """
+    Foto inmutable de la liga en memoria: competiciones, equipos, jugadores, partidos y
+    eventos, con índices por competición, fecha (ronda), zona, equipo y día.
+    Se construye con una consulta por tabla y se reemplaza entera tras cada sincronización.
+    """
+    __slots__ = (
+        "generation", "built_at", "competitions", "teams", "teams_by_comet", "players",
+        "matches", "matches_by_comet", "matches_by_competition", "matches_by_round",
+        "matches_by_zone", "matches_by_team", "matches_by_day", "events_by_match",
+    )
+
+    def __init__(self, db: Session, generation: int):
+        self.generation = generation
+        self.built_at = time.monotonic()
+        self.competitions = {c.id: c for c in _load(db, CompetitionRecord, Competition)}
+        self.teams = {t.id: t for t in _load(db, TeamRecord, Team)}
+        self.teams_by_comet = {t.team_id_comet: t for t in self.teams.values()}
+        self.players = {p.id: p for p in _load(db, PlayerRecord, Player)}
+
+        matches = sorted(_load(db, MatchRecord, Match), key=_match_order)
+        self.matches = {m.id: m for m in matches}
+        self.matches_by_comet = {m.match_id_comet: m for m in matches}
+        by_competition, by_round, by_zone, by_team, by_day = (defaultdict(list) for _ in range(5))
+        for m in matches:
+            by_competition[m.competition_id].append(m)
+            by_round[(m.competition_id, m.round)].append(m)
+            by_zone[(m.competition_id, m.zone)].append(m)
+            for team_id in {m.home_team_id, m.away_team_id}:
+                by_team[team_id].append(m)
+            if m.date:
+                by_day[m.date.date()].append(m)
+        self.matches_by_competition = _freeze(by_competition)
+        self.matches_by_round = _freeze(by_round)
+        self.matches_by_zone = _freeze(by_zone)
+        self.matches_by_team = _freeze(by_team)
+        self.matches_by_day = _freeze(by_day)
+
+        by_match = defaultdict(list)
+        for e in _load(db, EventRecord, Event):
+            by_match[e.match_id].append(e)
+        self.events_by_match = {match_id: tuple(sorted(events, key=_event_order)) for match_id, events in by_match.items()}
+
+    def find_competition(self, name: str = MAIN_COMPETITION_NAME, season: str = MAIN_COMPETITION_SEASON):
+        for competition in self.competitions.values():
+            if competition.name == name and competition.season == season:
+                return competition
+        return None
+
+    def competition_matches(self, competition_id: int) -> tuple:
+        return self.matches_by_competition.get(competition_id, ())
+
+    def zones(self, competition_id: int) -> list:
+        return sorted({m.zone for m in self.competition_matches(competition_id) if m.zone and m.zone.strip() != ''})
+
+    def rounds(self, competition_id: int) -> list:
+        return [r for r in {m.round for m in self.competition_matches(competition_id)} if r is not None]
+
+    def latest_played_round(self, competition_id: int):
+        """
+        Ronda del partido 'played' más reciente de la competición (o None).
+        """
+        played = [m for m in self.competition_matches(competition_id) if m.status == 'played' and m.date]
+        return max(played, key=lambda m: m.date).round if played else None
+
+def _freeze(index: dict) -> dict:
+    return {key: tuple(values) for key, values in index.items()}
+
+
+# --- SNAPSHOT DEL PROCESO ---
+_snapshot = None
+_build_lock = threading.Lock()
+_async_build_lock = asyncio.Lock()
+
+def _is_fresh(snapshot) -> bool:
+    return snapshot is not None and snapshot.generation == current_generation() \
+        and time.monotonic() - snapshot.built_at < SNAPSHOT_TTL_SECONDS
+
+def refresh_league_snapshot(db: Session = None) -> LeagueSnapshot:
+    """
+    Construye una nueva foto y la publica de forma atómica (los lectores en curso siguen
+    usando la anterior).
+    """
+    global _snapshot
+    generation = current_generation()
+    if db is None:
+        with SessionLocal() as session:
+            snapshot = LeagueSnapshot(session, generation)
+    else:
+        snapshot = LeagueSnapshot(db, generation)
+    _snapshot = snapshot
+    return snapshot
+
+def get_league_snapshot(db: Session = None) -> LeagueSnapshot:
+    """
+    Devuelve la foto vigente. Si quedó vieja, un solo hilo la reconstruye mientras el resto
+    sigue leyendo la anterior; solo se espera cuando todavía no existe ninguna.
+    """
+    snapshot = _snapshot
+    if _is_fresh(snapshot):
+        return snapshot
+    if not _build_lock.acquire(blocking=snapshot is None):
+        return snapshot
+    try:
+        if not _is_fresh(_snapshot):
+            refresh_league_snapshot(db)
+        return _snapshot
+    finally:
+        _build_lock.release()
+
+async def get_league_snapshot_async(db: AsyncSession) -> LeagueSnapshot:
+    """
+    Variante para rutas async: nunca bloquea el event loop esperando a otro hilo.
+    """
+    snapshot = _snapshot
+    if _is_fresh(snapshot) or (snapshot is not None and _async_build_lock.locked()):
+        return snapshot
+    async with _async_build_lock:
+        if not _is_fresh(_snapshot):
+            await db.run_sync(refresh_league_snapshot)
+    return _snapshot
@@ -1,22 +1,29 @@
-import requests
+import json
+import tempfile
 from datetime import datetime
 from sqlalchemy.orm import Session
 from database import SessionLocal
-from models import Match, Team, Competition, Player, Event
+from models import Match, Team, Competition, Player
+from services.comet_client import iter_batches, iter_report_rows
+from services.event_writer import EventUpserter, sanitize_minute, sanitize_phase
+from services.cache import bump_generation
+from services.standings_store import rebuild_standings
 import os
-from collections import defaultdict
 
 # --- CONFIGURACIÓN ---
 # Usamos la API Key 1, que devuelve el reporte de eventos completo.
 API_KEY = os.getenv("COMET_API_KEY_1")
-BASE_URL = "https://latam.analyticom.de/data-backend/api/public/areports/run"
 # Usamos el Template ID del reporte de Eventos
 EVENTS_TEMPLATE_ID = 3315314
+SEASON = "2025"
+# Eventos escritos por lote (la memoria no crece con el tamaño de la temporada)
+RECONSTRUCTION_BATCH_SIZE = int(os.getenv("RECONSTRUCTION_BATCH_SIZE", "1000"))
+# Campos del primer evento de cada partido que se usan para crearlo
+MATCH_INFO_FIELDS = ("competitionType", "season", "category", "gender", "matchDescription", "date", "matchStatus", "round")
 
 # --- CACHÉ EN MEMORIA ---
 competitions_cache = {}
 teams_cache = {}
-players_cache = {}
 
 # --- HELPERS ---
 def _get_or_create_competition(db: Session, match_info: dict):
@@ -47,54 +54,40 @@ def _get_or_create_team(db: Session, team_uid: int, team_name: str):
     teams_cache[team_uid] = new_team
     return new_team
 
-def _get_or_create_player(db: Session, event_row: dict, team_id: int):
-    person_id = event_row.get("personId")
-    if not person_id: return None
-    if person_id in players_cache: return players_cache[person_id]
-    player = db.query(Player).filter_by(person_id=person_id).first()
-    if player:
-        players_cache[person_id] = player
-        return player
-    new_player = Player(person_id=person_id, name=event_row.get("personName", "Desconocido"), team_id=team_id)
-    db.add(new_player)
-    db.flush()
-    players_cache[person_id] = new_player
-    return new_player
+def _is_current_season(row: dict) -> bool:
+    return row.get("season") == SEASON
 
 def run_reconstruction_sync():
+    """
+    Reconstruye partidos y eventos de la temporada desde el reporte de eventos.
+    Las filas se decodifican en streaming y se filtran por temporada al llegar; los eventos
+    se guardan en un archivo temporal (NDJSON) y se escriben por lotes en una segunda pasada,
+    así la memoria solo depende de la cantidad de partidos, no de eventos.
+    """
     db = SessionLocal()
     if not API_KEY: 
         print("❌ Error: COMET_API_KEY_1 no está configurada.")
+        db.close()
         return
 
+    spool = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
     try:
         print("🚀 Iniciando Sincronización por Reconstrucción...")
         
-        # --- PASO 1: OBTENER TODOS LOS EVENTOS DE LA API ---
-        print("   Paso 1: Descargando todos los eventos de 2025...")
-        all_events = []
-        page = 0
-        while True:
-            url = f"{BASE_URL}/{EVENTS_TEMPLATE_ID}/{page}/999/?API_KEY={API_KEY}"
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            results = data.get("results", [])
-            if not results: break
-            
-            for row in results:
-                if row.get("season") == "2025":
-                    all_events.append(row)
-            
-            print(f"      -> Página {page} de eventos descargada.")
-            if page >= data.get("lastPage", 0): break
-            page += 1
-        print(f"   -> Se encontraron {len(all_events)} eventos para la temporada 2025.")
-
-        # --- PASO 2: RECONSTRUIR PARTIDOS EN MEMORIA ---
-        print("\n   Paso 2: Reconstruyendo partidos desde los eventos...")
+        # --- PASO 1 y 2: LEER LOS EVENTOS EN STREAMING Y RECONSTRUIR PARTIDOS ---
+        print(f"   Paso 1: Descargando los eventos de {SEASON} y reconstruyendo partidos...")
         reconstructed_matches = {}
-        for event in all_events:
+        total_events = 0
+        current_page = None
+        for page, event in iter_report_rows(EVENTS_TEMPLATE_ID, API_KEY, row_filter=_is_current_season):
+            if page != current_page:
+                if current_page is not None:
+                    print(f"      -> Página {current_page} de eventos descargada.")
+                current_page = page
+            spool.write(json.dumps(event, ensure_ascii=False))
+            spool.write("\n")
+            total_events += 1
+
             match_id = event.get("matchId")
             if not match_id: continue
 
@@ -107,7 +100,7 @@ def run_reconstruction_sync():
                 away_name = teams_split[1].strip() if len(teams_split) > 1 else "Desconocido"
 
                 reconstructed_matches[match_id] = {
-                    "match_info": event,
+                    "match_info": {field: event.get(field) for field in MATCH_INFO_FIELDS},
                     "home_name": home_name,
                     "away_name": away_name,
                     "home_team_ids": set(),
@@ -119,12 +112,16 @@ def run_reconstruction_sync():
                 reconstructed_matches[match_id]["home_team_ids"].add(team_id)
             else:
                 reconstructed_matches[match_id]["away_team_ids"].add(team_id)
+        if current_page is not None:
+            print(f"      -> Página {current_page} de eventos descargada.")
+        print(f"   -> Se encontraron {total_events} eventos para la temporada {SEASON}.")
         print(f"   -> Se reconstruyeron {len(reconstructed_matches)} partidos únicos.")
 
         # --- PASO 3: GUARDAR PARTIDOS EN DB ---
         print("\n   Paso 3: Guardando partidos reconstruidos en la base de datos...")
-        existing_match_uids = {m.match_id_comet for m in db.query(Match.match_id_comet).all()}
-        matches_to_commit = []
+        existing_match_uids = {m.match_id_comet for m in db.query(Match.match_id_comet).yield_per(1000)}
+        new_matches = 0
+        affected_competitions = set()
         for match_id, match_data in reconstructed_matches.items():
             if match_id in existing_match_uids: continue
 
@@ -145,38 +142,55 @@ def run_reconstruction_sync():
             away_score = int(score_part.split(":")[1]) if score_part and len(score_part.split(":")) > 1 and score_part.split(":")[1].isdigit() else None
 
             new_match = Match(match_id_comet=match_id, competition_id=competition.id, home_team_id=home_team.id, away_team_id=away_team.id, date=datetime.fromtimestamp(match_data["match_info"].get("date") / 1000) if match_data["match_info"].get("date") else None, status=match_data["match_info"].get("matchStatus", "Desconocido"), round=str(match_data["match_info"].get("round", "")).strip() or None, home_score=home_score, away_score=away_score)
-            matches_to_commit.append(new_match)
-        
-        if matches_to_commit:
-            db.add_all(matches_to_commit)
-            print(f"   -> {len(matches_to_commit)} partidos nuevos añadidos a la sesión.")
+            db.add(new_match)
+            affected_competitions.add(competition.id)
+            new_matches += 1
+            if new_matches % RECONSTRUCTION_BATCH_SIZE == 0:
+                db.commit()
+        reconstructed_matches.clear()
+
+        if new_matches:
+            print(f"   -> {new_matches} partidos nuevos añadidos a la sesión.")
+        db.commit() # Guardar partidos para que los eventos puedan referenciarlos
+
+        # Los partidos nuevos entran con marcador: las tablas materializadas deben reflejarlos
+        if affected_competitions:
+            rebuild_standings(db, affected_competitions)
+            db.commit()
+            print(f"   -> Tablas de posiciones reconstruidas para {len(affected_competitions)} competiciones.")
 
-        # --- PASO 4: GUARDAR EVENTOS EN DB ---
+        # --- PASO 4: GUARDAR EVENTOS EN DB (POR LOTES) ---
         print("\n   Paso 4: Guardando eventos en la base de datos...")
-        db.commit() # Guardar partidos para que los eventos puedan referenciarlos
-        matches_cache = {m.match_id_comet: m.id for m in db.query(Match.match_id_comet, Match.id).all()}
-        teams_cache.update({t.team_id_comet: t.id for t in db.query(Team.team_id_comet, Team.id).all()})
-        events_to_commit = []
-        for event_row in all_events:
-            match_db_id = matches_cache.get(event_row.get("matchId"))
-            if not match_db_id: continue
-            team_db_id = teams_cache.get(event_row.get("teamId"))
-            if not team_db_id: continue
-            player = _get_or_create_player(db, event_row, team_db_id)
-            if not player: continue
-
-            if not db.query(Event).filter_by(match_id=match_db_id, player_id=player.id, event_type=event_row.get("matchEventType"), minute=event_row.get("minute")).first():
-                new_event = Event(match_id=match_db_id, player_id=player.id, team_id=team_db_id, event_type=event_row.get("matchEventType"), sub_type=event_row.get("eventSubType"), minute=event_row.get("minute"), phase=event_row.get("phase"), is_home=event_row.get("home") == "Sí", stoppage_time=event_row.get("stoppageTime"))
-                events_to_commit.append(new_event)
-
-        if events_to_commit:
-            db.add_all(events_to_commit)
-            print(f"   -> {len(events_to_commit)} eventos nuevos añadidos a la sesión.")
-
-        # --- PASO 5: COMMIT FINAL ---
-        if matches_to_commit or events_to_commit:
-            print("\n💾 Guardando todo en la base de datos...")
+        matches_cache = {m.match_id_comet: m.id for m in db.query(Match.match_id_comet, Match.id).yield_per(1000)}
+        team_ids = {t.team_id_comet: t.id for t in db.query(Team.team_id_comet, Team.id).yield_per(1000)}
+        player_ids = {p.person_id: p.id for p in db.query(Player.person_id, Player.id).yield_per(1000)}
+        total_new_events = 0
+        spool.seek(0)
+        for batch in iter_batches((json.loads(line) for line in spool), RECONSTRUCTION_BATCH_SIZE):
+            event_rows = []
+            for event_row in batch:
+                match_db_id = matches_cache.get(event_row.get("matchId"))
+                if not match_db_id: continue
+                team_db_id = team_ids.get(event_row.get("teamId"))
+                if not team_db_id: continue
+                person_id = event_row.get("personId")
+                if not person_id: continue
+                if person_id not in player_ids:
+                    player = Player(person_id=person_id, name=event_row.get("personName", "Desconocido"), team_id=team_db_id)
+                    db.add(player)
+                    db.flush()
+                    player_ids[person_id] = player.id
+
+                event_rows.append(dict(match_id=match_db_id, player_id=player_ids[person_id], team_id=team_db_id, event_type=event_row.get("matchEventType"), sub_type=event_row.get("eventSubType"), minute=sanitize_minute(event_row.get("minute")), phase=sanitize_phase(event_row.get("phase")), is_home=event_row.get("home") == "Sí", stoppage_time=event_row.get("stoppageTime")))
+
+            # Un upserter por lote: solo carga las claves de los partidos del lote
+            inserted_events, _ = EventUpserter(db).upsert(event_rows)
             db.commit()
+            total_new_events += len(inserted_events)
+
+        # --- PASO 5: RESUMEN ---
+        if new_matches or total_new_events:
+            print(f"   -> {total_new_events} eventos nuevos guardados.")
             print("✅ COMMIT FINAL EXITOSO.")
         else:
             print("\nℹ️ No hay nada nuevo para guardar.")
@@ -185,4 +199,7 @@ def run_reconstruction_sync():
         print(f"❌ Error inesperado en la reconstrucción: {e}")
         db.rollback()
     finally:
-        db.close()
\ No newline at end of file
+        spool.close()
+        db.close()
+        # Invalida las respuestas cacheadas: los datos pudieron cambiar (incluso con commits parciales)
+        bump_generation()
@@ -0,0 +1,223 @@
+# backend/services/request_metrics.py
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+# --- CONFIGURACIÓN ---
+# Una línea JSON por petición con sus métricas ("false" para desactivarla)
+REQUEST_METRICS_LOG = os.getenv("REQUEST_METRICS_LOG", "true").lower() not in ("0", "false", "no")
+# Largo máximo de la sentencia más lenta que se guarda en logs y en el endpoint de diagnóstico
+STATEMENT_PREVIEW_CHARS = 300
+
+logger = logging.getLogger("ligachajari.requests")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class RequestMetrics:
+    """
+    Métricas de una petición: sentencias SQL, tiempo total en la BD, la sentencia más
+    lenta y el tiempo de serialización JSON.
+    """
+    __slots__ = ("statements", "db_seconds", "slowest_seconds", "slowest_statement", "serialize_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.serialize_seconds = 0.0
+
+    def record_statement(self, statement: str, seconds: float):
+        self.statements += 1
+        self.db_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+# Las métricas de la petición en curso. Los hilos del threadpool y las tareas de asyncio
+# heredan el contexto, así que las consultas de rutas sync y async suman al mismo objeto.
+_current_metrics: ContextVar = ContextVar("request_metrics", default=None)
+
+def current_request_metrics():
+    return _current_metrics.get()
+
+def record_serialization(seconds: float):
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.serialize_seconds += seconds
+
+def _preview(statement: str) -> str:
+    return " ".join(statement.split())[:STATEMENT_PREVIEW_CHARS]
+
+
+# --- HOOKS DE SQLALCHEMY ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("request_metrics_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("request_metrics_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.record_statement(statement, elapsed)
+
+def _handle_error(exception_context):
+    # La sentencia falló: descartar su inicio para no desalinear la pila
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("request_metrics_start"):
+        connection.info["request_metrics_start"].pop()
+
+def instrument_engine(engine):
+    """
+    Registra los hooks que miden cada sentencia. Para un AsyncEngine usar `.sync_engine`.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+class TimedJSONResponse(JSONResponse):
+    """
+    JSONResponse que suma el tiempo de codificación a las métricas de la petición.
+    """
+    def render(self, content) -> bytes:
+        start = time.perf_counter()
+        body = super().render(content)
+        record_serialization(time.perf_counter() - start)
+        return body
+
+
+# --- ACUMULADO POR RUTA (para el endpoint de diagnóstico) ---
+class RouteStats:
+    __slots__ = ("route", "requests", "total_statements", "max_statements", "total_db_seconds",
+                 "max_seconds", "slowest_seconds", "slowest_statement")
+
+    def __init__(self, route: str):
+        self.route = route
+        self.requests = 0
+        self.total_statements = 0
+        self.max_statements = 0
+        self.total_db_seconds = 0.0
+        self.max_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def add(self, metrics: RequestMetrics, seconds: float):
+        self.requests += 1
+        self.total_statements += metrics.statements
+        self.max_statements = max(self.max_statements, metrics.statements)
+        self.total_db_seconds += metrics.db_seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if metrics.slowest_statement is not None and metrics.slowest_seconds >= self.slowest_seconds:
+            self.slowest_seconds = metrics.slowest_seconds
+            self.slowest_statement = _preview(metrics.slowest_statement)
+
+    def to_dict(self) -> dict:
+        return {
+            "route": self.route,
+            "requests": self.requests,
+            "avg_statements": round(self.total_statements / self.requests, 2),
+            "max_statements": self.max_statements,
+            "avg_db_ms": round(self.total_db_seconds * 1000 / self.requests, 2),
+            "max_total_ms": round(self.max_seconds * 1000, 2),
+            "slowest_statement_ms": round(self.slowest_seconds * 1000, 2),
+            "slowest_statement": self.slowest_statement,
+        }
+
+_route_stats = {}
+_route_stats_lock = threading.Lock()
+
+def _record_route(route: str, metrics: RequestMetrics, seconds: float):
+    with _route_stats_lock:
+        stats = _route_stats.get(route)
+        if stats is None:
+            stats = _route_stats[route] = RouteStats(route)
+        stats.add(metrics, seconds)
+
+def worst_routes(limit: int = 20) -> list:
+    """
+    Rutas ordenadas por cantidad de sentencias SQL (máximo y promedio por petición).
+    """
+    with _route_stats_lock:
+        rows = [stats.to_dict() for stats in _route_stats.values()]
+    rows.sort(key=lambda row: (row["max_statements"], row["avg_statements"], row["avg_db_ms"]), reverse=True)
+    return rows[:limit]
+
+def reset_route_stats():
+    with _route_stats_lock:
+        _route_stats.clear()
+
+
+def server_timing_header(metrics: RequestMetrics, total_seconds: float) -> str:
+    return ", ".join([
+        f'db;desc="{metrics.statements} queries";dur={metrics.db_seconds * 1000:.2f}',
+        f"db-slowest;dur={metrics.slowest_seconds * 1000:.2f}",
+        f"serialize;dur={metrics.serialize_seconds * 1000:.2f}",
+        f"total;dur={total_seconds * 1000:.2f}",
+    ])
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware ASGI que abre las métricas de cada petición HTTP, agrega el header
+    Server-Timing al responder, escribe el log estructurado y acumula por ruta.
+    En respuestas en streaming el header solo refleja lo ejecutado antes de empezar a
+    enviar el cuerpo; el log y el acumulado incluyen toda la petición.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(metrics, time.perf_counter() - start).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current_metrics.reset(token)
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            route_name = f"{scope['method']} {getattr(route, 'path', None) or '<sin ruta>'}"
+            _record_route(route_name, metrics, elapsed)
+            if REQUEST_METRICS_LOG:
+                logger.info(json.dumps({
+                    "event": "request",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_name,
+                    "status": status[0],
+                    "total_ms": round(elapsed * 1000, 2),
+                    "db_statements": metrics.statements,
+                    "db_ms": round(metrics.db_seconds * 1000, 2),
+                    "db_slowest_ms": round(metrics.slowest_seconds * 1000, 2),
+                    "db_slowest_statement": _preview(metrics.slowest_statement) if metrics.slowest_statement else None,
+                    "serialize_ms": round(metrics.serialize_seconds * 1000, 2),
+                }, ensure_ascii=False))
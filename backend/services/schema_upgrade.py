@@ -0,0 +1,78 @@
+# backend/services/schema_upgrade.py
+from sqlalchemy import UniqueConstraint, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DatabaseError
+from database import Base
+
+def add_missing_columns(engine: Engine) -> list:
+    """
+    Agrega a las tablas existentes las columnas nuevas del modelo (create_all no las agrega).
+    Se agregan siempre como columnas nullable y sin valor por defecto en la BD.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def create_missing_indexes(engine: Engine):
+    """
+    Crea los índices nuevos en tablas que ya existían (create_all no los agrega).
+    SQLite no refleja los índices funcionales, por eso también se toleran los ya existentes.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                index.create(bind=engine)
+            except DatabaseError as e:
+                if "already exists" not in str(e):
+                    raise
+
+def create_missing_unique_constraints(engine: Engine) -> dict:
+    """
+    Agrega las restricciones únicas con nombre del modelo a tablas que ya existían (create_all
+    no las agrega; sin ellas ON CONFLICT DO NOTHING no descarta nada). Primero borra los
+    duplicados de la clave, conservando la fila de menor id, y luego crea un índice único
+    con el nombre de la restricción. Devuelve {restricción: filas duplicadas borradas}.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = {}
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables or "id" not in table.columns:
+            continue
+        existing = {c["name"] for c in inspector.get_unique_constraints(table.name)}
+        existing.update(ix["name"] for ix in inspector.get_indexes(table.name))
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name or constraint.name in existing:
+                continue
+            columns = ", ".join(column.name for column in constraint.columns)
+            with engine.begin() as conn:
+                deleted = conn.execute(text(
+                    f"DELETE FROM {table.name} WHERE id NOT IN (SELECT MIN(id) FROM {table.name} GROUP BY {columns})"
+                )).rowcount
+                conn.execute(text(f"CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({columns})"))
+            created[constraint.name] = deleted
+    return created
+
+def upgrade_schema(engine: Engine):
+    added = add_missing_columns(engine)
+    if added:
+        print(f"🛠️ Columnas agregadas al esquema: {', '.join(added)}")
+    create_missing_indexes(engine)
+    for name, deleted in create_missing_unique_constraints(engine).items():
+        print(f"🛠️ Restricción única {name} creada ({deleted} filas duplicadas eliminadas)")
@@ -0,0 +1,93 @@
+# backend/services/score_reconciliation.py
+from sqlalchemy import func, case, update
+from sqlalchemy.orm import Session
+from models import Match, Event
+
+GOAL_EVENT_TYPES = ['Goal', 'Own goal', 'Penalty']
+UNPLAYED_STATUSES = ['SCHEDULED', 'ENTERED']
+
+def _goal_tallies_subquery(db: Session, match_ids=None):
+    """
+    Goles de local y visitante por partido, calculados con un único agregado agrupado.
+    """
+    query = db.query(
+        Event.match_id.label("match_id"),
+        func.count(case((Event.team_id == Match.home_team_id, 1))).label("home_goals"),
+        func.count(case((Event.team_id == Match.away_team_id, 1))).label("away_goals")
+    ).join(Match, Event.match_id == Match.id)\
+     .filter(Event.event_type.in_(GOAL_EVENT_TYPES))
+    if match_ids is not None:
+        query = query.filter(Event.match_id.in_(match_ids))
+    return query.group_by(Event.match_id).subquery()
+
+def reconcile_match_scores(db: Session, match_ids=None, apply: bool = True) -> dict:
+    """
+    Compara el marcador y estado de los partidos con los goles registrados en sus eventos
+    y corrige las diferencias con un único UPDATE masivo.
+    Si `match_ids` es None se revisan todos los partidos. No hace commit.
+    """
+    if match_ids is not None:
+        match_ids = list(match_ids)
+        if not match_ids:
+            return {"checked": 0, "updated": 0, "score_changes": 0, "status_changes": 0, "changes": []}
+
+    tallies = _goal_tallies_subquery(db, match_ids)
+    query = db.query(
+        Match.id,
+        Match.home_score,
+        Match.away_score,
+        Match.status,
+        func.coalesce(tallies.c.home_goals, 0),
+        func.coalesce(tallies.c.away_goals, 0)
+    ).outerjoin(tallies, Match.id == tallies.c.match_id)
+    if match_ids is not None:
+        query = query.filter(Match.id.in_(match_ids))
+
+    checked = 0
+    score_changes = 0
+    status_changes = 0
+    changes = []
+    for match_id, home_score, away_score, status, home_goals, away_goals in query:
+        checked += 1
+        score_is_inconsistent = (home_score != home_goals) or (away_score != away_goals)
+        status_is_inconsistent = (home_goals + away_goals > 0) and (status in UNPLAYED_STATUSES)
+        if not (score_is_inconsistent or status_is_inconsistent):
+            continue
+
+        new_status = 'PLAYED' if status_is_inconsistent else status
+        score_changes += score_is_inconsistent
+        status_changes += status_is_inconsistent
+        changes.append({
+            "id": match_id,
+            "before": {"home_score": home_score, "away_score": away_score, "status": status},
+            "after": {"home_score": home_goals, "away_score": away_goals, "status": new_status}
+        })
+
+    if apply and changes:
+        db.execute(update(Match), [{"id": c["id"], **c["after"]} for c in changes])
+
+    return {
+        "checked": checked,
+        "updated": len(changes),
+        "score_changes": score_changes,
+        "status_changes": status_changes,
+        "changes": changes
+    }
+
+def format_reconciliation_summary(summary: dict, sample_size: int = 5) -> str:
+    """
+    Resumen legible de una reconciliación: totales y algunos ejemplos de cambios.
+    """
+    lines = [
+        f"Partidos revisados: {summary['checked']} | Actualizados: {summary['updated']} "
+        f"(marcador: {summary['score_changes']}, estado: {summary['status_changes']})"
+    ]
+    for change in summary["changes"][:sample_size]:
+        before, after = change["before"], change["after"]
+        lines.append(
+            f"  - Partido ID {change['id']}: {before['home_score']}-{before['away_score']} '{before['status']}'"
+            f" -> {after['home_score']}-{after['away_score']} '{after['status']}'"
+        )
+    if summary["updated"] > sample_size:
+        lines.append(f"  ... y {summary['updated'] - sample_size} más.")
+    return "\n".join(lines)
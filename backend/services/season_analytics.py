@@ -0,0 +1,152 @@
+# backend/services/season_analytics.py
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import Match, Event, Team, Player
+from services.cache import GenerationCache
+
+MINUTES_PER_MATCH = 90
+TOP_SCORERS_PER_TEAM = 5
+
+class SeasonFrame:
+    """
+    Partidos y eventos de una competición cargados una sola vez en arrays de NumPy.
+
+    Partidos (en orden cronológico): ids de equipos local/visitante, goles (-1 si no hay
+    marcador). Eventos: índice del partido, equipo, jugador, minuto (-1 si no hay) y el
+    código del tipo de evento en minúsculas (ver `event_types`).
+    """
+    __slots__ = (
+        "competition_id", "match_ids", "home_team_ids", "away_team_ids", "home_scores", "away_scores",
+        "event_match_idx", "event_team_ids", "event_player_ids", "event_minutes", "event_type_codes",
+        "event_types", "team_names", "player_names",
+    )
+
+    def __init__(self, db: Session, competition_id: int):
+        self.competition_id = competition_id
+
+        matches = db.query(Match.id, Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score)\
+            .filter(Match.competition_id == competition_id)\
+            .order_by(Match.date.asc(), Match.id).all()
+        self.match_ids = np.array([m[0] for m in matches], dtype=np.int64)
+        self.home_team_ids = np.array([m[1] or -1 for m in matches], dtype=np.int64)
+        self.away_team_ids = np.array([m[2] or -1 for m in matches], dtype=np.int64)
+        self.home_scores = np.array([-1 if m[3] is None else m[3] for m in matches], dtype=np.int64)
+        self.away_scores = np.array([-1 if m[4] is None else m[4] for m in matches], dtype=np.int64)
+
+        events = db.query(Event.match_id, Event.team_id, Event.player_id, Event.minute, func.lower(Event.event_type))\
+            .join(Match, Event.match_id == Match.id)\
+            .filter(Match.competition_id == competition_id)\
+            .order_by(Event.id).all()
+        match_index = {match_id: i for i, match_id in enumerate(self.match_ids.tolist())}
+        self.event_types = sorted({e[4] or "" for e in events})
+        type_codes = {event_type: code for code, event_type in enumerate(self.event_types)}
+        self.event_match_idx = np.array([match_index[e[0]] for e in events], dtype=np.int64)
+        self.event_team_ids = np.array([e[1] or -1 for e in events], dtype=np.int64)
+        self.event_player_ids = np.array([e[2] or -1 for e in events], dtype=np.int64)
+        self.event_minutes = np.array([-1 if e[3] is None else e[3] for e in events], dtype=np.int64)
+        self.event_type_codes = np.array([type_codes[e[4] or ""] for e in events], dtype=np.int64)
+
+        team_ids = (set(self.home_team_ids.tolist()) | set(self.away_team_ids.tolist()) | set(self.event_team_ids.tolist())) - {-1}
+        player_ids = set(self.event_player_ids.tolist()) - {-1}
+        self.team_names = dict(db.query(Team.id, Team.name).filter(Team.id.in_(team_ids))) if team_ids else {}
+        self.player_names = dict(db.query(Player.id, Player.name).filter(Player.id.in_(player_ids))) if player_ids else {}
+
+    def events_of_type(self, event_type: str) -> np.ndarray:
+        """
+        Máscara booleana de los eventos de un tipo (comparación sin distinguir mayúsculas).
+        """
+        event_type = event_type.lower()
+        if event_type not in self.event_types:
+            return np.zeros(len(self.event_type_codes), dtype=bool)
+        return self.event_type_codes == self.event_types.index(event_type)
+
+    @property
+    def has_score(self) -> np.ndarray:
+        return (self.home_scores >= 0) & (self.away_scores >= 0)
+
+
+# --- CACHÉ DE FRAMES POR COMPETICIÓN ---
+# Cada frame vale hasta la próxima sincronización (cambio de generación).
+_frames = GenerationCache()
+
+def get_season_frame(db: Session, competition_id: int) -> SeasonFrame:
+    return _frames.get_or_compute(competition_id, lambda: SeasonFrame(db, competition_id))
+
+
+# --- ESTADÍSTICAS ---
+
+def goals_by_minute(frame: SeasonFrame) -> dict:
+    minutes = frame.event_minutes[frame.events_of_type("goal")]
+    minutes = minutes[(minutes > 0) & (minutes < MINUTES_PER_MATCH)]
+    return {"minutes": np.bincount(minutes, minlength=MINUTES_PER_MATCH).tolist()}
+
+def avg_goals_per_match(frame: SeasonFrame) -> dict:
+    played = frame.has_score
+    valid_matches = int(played.sum())
+    total_goals = int(frame.home_scores[played].sum() + frame.away_scores[played].sum())
+    avg = total_goals / valid_matches if valid_matches > 0 else 0
+    return {"average_goals_per_match": round(avg, 2), "total_matches": valid_matches}
+
+def top_scorers_by_team(frame: SeasonFrame, limit: int = TOP_SCORERS_PER_TEAM) -> dict:
+    """
+    Goleadores de cada equipo, agrupados por nombre de equipo y de jugador.
+    Los empates en goles respetan el orden del primer gol.
+    """
+    goals = np.flatnonzero(frame.events_of_type("goal"))
+    goals = [i for i in goals.tolist()
+             if frame.event_team_ids[i] in frame.team_names and frame.event_player_ids[i] in frame.player_names]
+    if not goals:
+        return {}
+
+    team_labels, team_codes = np.unique([frame.team_names[frame.event_team_ids[i]] for i in goals], return_inverse=True)
+    player_labels, player_codes = np.unique([frame.player_names[frame.event_player_ids[i]] for i in goals], return_inverse=True)
+    keys = team_codes * len(player_labels) + player_codes
+    _, first_index, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    # Equipos en el orden de su primer gol; jugadores por goles desc. y luego por su primer gol
+    result = {str(team_labels[team_codes[i]]): [] for i in np.sort(first_index).tolist()}
+    for group in np.lexsort((first_index, -counts)).tolist():
+        first = first_index[group]
+        players = result[str(team_labels[team_codes[first]])]
+        if len(players) < limit:
+            players.append((str(player_labels[player_codes[first]]), int(counts[group])))
+    return result
+
+def streaks(frame: SeasonFrame) -> dict:
+    """
+    Racha actual de victorias ("ganando") y de partidos sin perder ("invicto") de cada equipo,
+    contando hacia atrás desde su último partido con marcador.
+    """
+    both_teams = np.array([h in frame.team_names and a in frame.team_names
+                           for h, a in zip(frame.home_team_ids.tolist(), frame.away_team_ids.tolist())], dtype=bool)
+    teams_seen = np.concatenate([frame.home_team_ids[both_teams], frame.away_team_ids[both_teams]])
+
+    # Una fila por (equipo, partido con marcador), en orden cronológico dentro de cada equipo
+    played = both_teams & frame.has_score
+    order = np.flatnonzero(played)
+    team = np.concatenate([frame.home_team_ids[order], frame.away_team_ids[order]])
+    goal_diff = np.concatenate([
+        frame.home_scores[order] - frame.away_scores[order],
+        frame.away_scores[order] - frame.home_scores[order],
+    ])
+    chronological = np.concatenate([order, order])
+    rows = np.lexsort((chronological, team))
+    team, goal_diff = team[rows], goal_diff[rows]
+
+    result = {}
+    for team_id in dict.fromkeys(teams_seen.tolist()):
+        result[frame.team_names[team_id]] = {"ganando": 0, "invicto": 0}
+    if len(team) == 0:
+        return result
+
+    starts = np.flatnonzero(np.r_[True, team[1:] != team[:-1]])
+    ends = np.r_[starts[1:], len(team)]
+    positions = np.arange(len(team))
+    for key, breaks in (("ganando", goal_diff <= 0), ("invicto", goal_diff < 0)):
+        # Última posición que corta la racha dentro de cada equipo (o el inicio si no hay)
+        last_break = np.maximum.reduceat(np.where(breaks, positions, -1), starts)
+        run_start = np.maximum(last_break + 1, starts)
+        for team_id, length in zip(team[starts].tolist(), (ends - run_start).tolist()):
+            result[frame.team_names[team_id]][key] = length
+    return result
@@ -1,12 +1,18 @@
 # backend/services/standings_service.py
+import os
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from models import Match, Team, Competition
+from services.standings_store import GENERAL_ZONE, PLAYED_STATUSES, compute_standings, read_standings
+from services.zone_scope import get_competition_zones
+
+# Cantidad de partidos de la "forma reciente" en standings-extended y el dashboard
+RECENT_FORM_MATCHES = int(os.getenv("RECENT_FORM_MATCHES", "5"))
 
 def calculate_standings(db: Session, competition_id: int, zone: str = None):
     """
-    Calcula la tabla de posiciones para una competición específica.
-    Si se proporciona una zona, calcula la tabla para esa zona incluyendo partidos interzonales.
+    Obtiene la tabla de posiciones para una competición específica desde la tabla materializada.
+    Si se proporciona una zona, devuelve la tabla de esa zona incluyendo partidos interzonales.
     """
     print("-" * 50)
     log_msg = f"[Debug] Se ha llamado a calculate_standings con competition_id: {competition_id}"
@@ -14,87 +20,32 @@ def calculate_standings(db: Session, competition_id: int, zone: str = None):
         log_msg += f" y zone: '{zone}'"
     print(log_msg)
 
-    competition = db.query(Competition).filter(Competition.id == competition_id).first()
-    if not competition:
-        return {"error": f"Competición con id={competition_id} no encontrada"}
-    
-    standings = {}
-    team_ids_in_table = set()
-    
-    # --- Determinar los equipos y partidos a procesar ---
-    if not zone:
-        # MODO GENERAL: Procesar todos los partidos de la competición
-        matches = db.query(Match).filter(
-            Match.competition_id == competition_id,
-            Match.status.in_(['PLAYED', 'CORRECT'])
-        ).all()
-        for match in matches:
-            if match.home_team_id: team_ids_in_table.add(match.home_team_id)
-            if match.away_team_id: team_ids_in_table.add(match.away_team_id)
+    # --- Lectura de la tabla materializada (una sola consulta indexada) ---
+    rows = read_standings(db, competition_id, zone)
+    if rows:
+        result = [
+            {
+                "team": row.team, "played": row.played, "won": row.won, "drawn": row.drawn, "lost": row.lost,
+                "goals_for": row.goals_for, "goals_against": row.goals_against, "points": row.points
+            }
+            for row in rows
+        ]
     else:
-        # MODO ZONA: Lógica compleja con interzonales
-        # 1. Identificar equipos de la zona
-        zone_matches = db.query(Match).filter(Match.competition_id == competition_id, Match.zone == zone).all()
-        for match in zone_matches:
-            if match.home_team_id: team_ids_in_table.add(match.home_team_id)
-            if match.away_team_id: team_ids_in_table.add(match.away_team_id)
-
-        if not team_ids_in_table:
+        # --- Competición aún no materializada: calcular en memoria ---
+        competition = db.query(Competition).filter(Competition.id == competition_id).first()
+        if not competition:
+            return {"error": f"Competición con id={competition_id} no encontrada"}
+
+        zone_key = zone or GENERAL_ZONE
+        memberships = get_competition_zones(db, competition_id).memberships
+        table = {team_id: stats for (row_zone, team_id), stats in compute_standings(db, competition_id, memberships).items() if row_zone == zone_key}
+        if not table:
             return []
 
-        # 2. Obtener partidos de la zona + interzonales que involucren a esos equipos
-        matches = db.query(Match).filter(
-            Match.competition_id == competition_id,
-            Match.status.in_(['PLAYED', 'CORRECT']),
-            or_(Match.zone == zone, Match.zone == 'INTERZONAL'),
-            or_(Match.home_team_id.in_(team_ids_in_table), Match.away_team_id.in_(team_ids_in_table))
-        ).all()
-
-    # --- Inicializar el diccionario de standings para los equipos relevantes ---
-    teams_in_table = db.query(Team).filter(Team.id.in_(team_ids_in_table)).all()
-    for team in teams_in_table:
-        standings[team.id] = {
-            "team": team, "played": 0, "won": 0, "drawn": 0, "lost": 0,
-            "goals_for": 0, "goals_against": 0, "points": 0
-        }
-
-    # --- Procesar los partidos y calcular estadísticas ---
-    for match in matches:
-        if match.home_score is None or match.away_score is None: continue
-
-        home_id, away_id = match.home_team_id, match.away_team_id
-        home_score, away_score = match.home_score, match.away_score
-
-        # Actualizar estadísticas para el equipo local si está en la tabla
-        if home_id in standings:
-            standings[home_id]['played'] += 1
-            standings[home_id]['goals_for'] += home_score
-            standings[home_id]['goals_against'] += away_score
-            if home_score > away_score:
-                standings[home_id]['won'] += 1
-                standings[home_id]['points'] += 3
-            elif home_score < away_score:
-                standings[home_id]['lost'] += 1
-            else:
-                standings[home_id]['drawn'] += 1
-                standings[home_id]['points'] += 1
-
-        # Actualizar estadísticas para el equipo visitante si está en la tabla
-        if away_id in standings:
-            standings[away_id]['played'] += 1
-            standings[away_id]['goals_for'] += away_score
-            standings[away_id]['goals_against'] += home_score
-            if away_score > home_score:
-                standings[away_id]['won'] += 1
-                standings[away_id]['points'] += 3
-            elif away_score < home_score:
-                standings[away_id]['lost'] += 1
-            else:
-                standings[away_id]['drawn'] += 1
-                standings[away_id]['points'] += 1
-
-    # --- Ordenar y devolver resultados ---
-    result = sorted(standings.values(), key=lambda x: (-x["points"], -(x["goals_for"] - x["goals_against"]), -x["goals_for"]))
+        teams = {team.id: team for team in db.query(Team).filter(Team.id.in_(table.keys()))}
+        result = [{"team": teams[team_id], **stats} for team_id, stats in sorted(table.items()) if team_id in teams]
+        result.sort(key=lambda x: (-x["points"], -(x["goals_for"] - x["goals_against"]), -x["goals_for"]))
+
     for i, entry in enumerate(result):
         entry["position"] = i + 1
 
@@ -104,13 +55,52 @@ def get_zones_for_competition(db: Session, competition_id: int):
     """
     Obtiene una lista de todas las zonas únicas para una competición específica.
     """
-    zones_query = db.query(Match.zone).filter(Match.competition_id == competition_id).distinct()
-    zones = [zone[0] for zone in zones_query if zone[0] and zone[0].strip() != '']
-    return sorted(zones)
+    return list(get_competition_zones(db, competition_id).zones)
+
+def _result_letter(goals_for: int, goals_against: int) -> str:
+    if goals_for > goals_against:
+        return 'G' # Ganado
+    if goals_for < goals_against:
+        return 'P' # Perdido
+    return 'E' # Empatado
 
-def calculate_standings_with_recent_results(db: Session, competition_id: int, zone: str = None):
+def get_recent_results(db: Session, competition_id: int, team_ids, count: int = RECENT_FORM_MATCHES) -> dict:
+    """
+    Últimos `count` resultados de cada equipo (del más antiguo al más reciente), en una sola
+    consulta y una sola pasada. Los partidos sin marcador no cuentan.
+    """
+    team_ids = set(team_ids)
+    recent = {team_id: [] for team_id in team_ids}
+    if not team_ids:
+        return recent
+
+    matches = db.query(Match.home_team_id, Match.away_team_id, Match.home_score, Match.away_score).filter(
+        Match.competition_id == competition_id,
+        or_(Match.home_team_id.in_(team_ids), Match.away_team_id.in_(team_ids)),
+        Match.status.in_(PLAYED_STATUSES),
+        Match.home_score.isnot(None),
+        Match.away_score.isnot(None)
+    ).order_by(Match.date.desc(), Match.id.desc())
+
+    pending = len(team_ids)
+    for home_id, away_id, home_score, away_score in matches:
+        for team_id, goals_for, goals_against in ((home_id, home_score, away_score), (away_id, away_score, home_score)):
+            results = recent.get(team_id)
+            if results is None or len(results) >= count:
+                continue
+            results.append(_result_letter(goals_for, goals_against))
+            if len(results) == count:
+                pending -= 1
+        if pending == 0:
+            break
+
+    for results in recent.values():
+        results.reverse() # Del más antiguo al más reciente
+    return recent
+
+def calculate_standings_with_recent_results(db: Session, competition_id: int, zone: str = None, recent_count: int = RECENT_FORM_MATCHES):
     """
-    Calcula la tabla de posiciones y añade los resultados de los últimos 5 partidos de cada equipo.
+    Calcula la tabla de posiciones y añade los resultados de los últimos `recent_count` partidos de cada equipo.
     """
     # 1. Obtener la tabla de posiciones base
     standings_base = calculate_standings(db, competition_id, zone)
@@ -118,34 +108,9 @@ def calculate_standings_with_recent_results(db: Session, competition_id: int, zo
     if not isinstance(standings_base, list):
         return standings_base # Devolver error si lo hubiera
 
-    # 2. Para cada equipo, obtener sus últimos 5 resultados
+    # 2. Últimos resultados de todos los equipos de la tabla en una sola consulta
+    recent = get_recent_results(db, competition_id, [entry['team'].id for entry in standings_base], recent_count)
     for team_entry in standings_base:
-        team_id = team_entry['team'].id
-        
-        # Consultar los últimos 5 partidos jugados por el equipo
-        recent_matches = db.query(Match).filter(
-            Match.competition_id == competition_id,
-            or_(Match.home_team_id == team_id, Match.away_team_id == team_id),
-            Match.status.in_(['PLAYED', 'CORRECT'])
-        ).order_by(Match.date.desc()).limit(5).all()
-
-        results = []
-        for match in reversed(recent_matches): # Invertir para tener del más antiguo al más reciente
-            if match.home_team_id == team_id:
-                if match.home_score > match.away_score:
-                    results.append('G') # Ganado
-                elif match.home_score < match.away_score:
-                    results.append('P') # Perdido
-                else:
-                    results.append('E') # Empatado
-            else: # El equipo era visitante
-                if match.away_score > match.home_score:
-                    results.append('G')
-                elif match.away_score < match.home_score:
-                    results.append('P')
-                else:
-                    results.append('E')
-        
-        team_entry['recent_results'] = results
+        team_entry['recent_results'] = recent[team_entry['team'].id]
 
     return standings_base
@@ -0,0 +1,194 @@
+# backend/services/standings_store.py
+from collections import defaultdict
+from sqlalchemy import insert, update, delete
+from sqlalchemy.orm import Session, joinedload
+from models import Match, Competition, Standing
+
+GENERAL_ZONE = ""
+INTERZONAL = "INTERZONAL"
+PLAYED_STATUSES = ['PLAYED', 'CORRECT']
+STAT_FIELDS = ("played", "won", "drawn", "lost", "goals_for", "goals_against", "points")
+
+def _empty_stats() -> dict:
+    return {field: 0 for field in STAT_FIELDS}
+
+def _team_result(goals_for: int, goals_against: int) -> dict:
+    stats = _empty_stats()
+    stats["played"] = 1
+    stats["goals_for"] = goals_for
+    stats["goals_against"] = goals_against
+    if goals_for > goals_against:
+        stats["won"] = 1
+        stats["points"] = 3
+    elif goals_for < goals_against:
+        stats["lost"] = 1
+    else:
+        stats["drawn"] = 1
+        stats["points"] = 1
+    return stats
+
+def match_contribution(home_score, away_score, status):
+    """
+    Aporte de un partido a la tabla: (estadísticas del local, del visitante),
+    o None si el partido no cuenta (no jugado o sin marcador).
+    """
+    if status not in PLAYED_STATUSES or home_score is None or away_score is None:
+        return None
+    return _team_result(home_score, away_score), _team_result(away_score, home_score)
+
+def load_zone_memberships(db: Session, competition_id: int) -> dict:
+    """
+    Zonas en las que participa cada equipo (según todos sus partidos, jugados o no).
+    """
+    memberships = defaultdict(set)
+    rows = db.query(Match.zone, Match.home_team_id, Match.away_team_id)\
+        .filter(Match.competition_id == competition_id, Match.zone.isnot(None), Match.zone != "")\
+        .distinct()
+    for zone, home_id, away_id in rows:
+        if home_id: memberships[home_id].add(zone)
+        if away_id: memberships[away_id].add(zone)
+    return memberships
+
+def standing_keys(match_zone, team_id, memberships) -> list:
+    """
+    Tablas (zona, equipo) a las que afecta un partido para uno de sus equipos.
+    Un partido de zona cuenta en la tabla general y en la de su zona; uno interzonal
+    cuenta además en todas las zonas del equipo, igual que en calculate_standings.
+    """
+    keys = [(GENERAL_ZONE, team_id)]
+    if match_zone == INTERZONAL:
+        keys.extend((zone, team_id) for zone in memberships.get(team_id, ()))
+    elif match_zone:
+        keys.append((match_zone, team_id))
+    return keys
+
+def compute_standings(db: Session, competition_id: int, memberships: dict = None) -> dict:
+    """
+    Calcula en memoria todas las tablas de una competición: {(zona, team_id): estadísticas}.
+    `memberships` permite reutilizar las zonas ya resueltas (ver zone_scope); si no, se consultan.
+    """
+    if memberships is None:
+        memberships = load_zone_memberships(db, competition_id)
+    table = {}
+    for team_id, zones in memberships.items():
+        for zone in zones:
+            table[(zone, team_id)] = _empty_stats()
+
+    matches = db.query(Match.home_team_id, Match.away_team_id, Match.zone, Match.home_score, Match.away_score, Match.status)\
+        .filter(Match.competition_id == competition_id, Match.status.in_(PLAYED_STATUSES))
+    for home_id, away_id, zone, home_score, away_score, status in matches:
+        contribution = match_contribution(home_score, away_score, status)
+        for team_id, stats in ((home_id, contribution and contribution[0]), (away_id, contribution and contribution[1])):
+            if not team_id: continue
+            keys = standing_keys(zone, team_id, memberships)
+            table.setdefault(keys[0], _empty_stats())
+            if not stats: continue
+            for key in keys:
+                row = table.setdefault(key, _empty_stats())
+                for field in STAT_FIELDS:
+                    row[field] += stats[field]
+    return table
+
+def rebuild_standings(db: Session, competition_ids=None) -> int:
+    """
+    Reconstruye por completo las tablas materializadas. No hace commit.
+    """
+    if competition_ids is None:
+        competition_ids = [c.id for c in db.query(Competition.id)]
+    total_rows = 0
+    for competition_id in competition_ids:
+        table = compute_standings(db, competition_id)
+        db.execute(delete(Standing).where(Standing.competition_id == competition_id))
+        rows = [
+            {"competition_id": competition_id, "zone": zone, "team_id": team_id, **stats}
+            for (zone, team_id), stats in table.items()
+        ]
+        if rows:
+            db.execute(insert(Standing), rows)
+        total_rows += len(rows)
+    return total_rows
+
+def apply_match_result_changes(db: Session, changes: list) -> int:
+    """
+    Aplica a las tablas materializadas solo la diferencia de los partidos cuyo marcador o
+    estado cambió (`changes` con el formato de reconcile_match_scores). Supone que el estado
+    "before" de cada partido ya está contado en la tabla: todo camino que escriba marcadores
+    debe mantener las tablas al día (delta o rebuild_standings).
+    Las competiciones que todavía no están materializadas, o cuya tabla no alcanza a
+    descontar el "before" (quedaría algún valor negativo), se reconstruyen completas.
+    No hace commit.
+    """
+    if not changes:
+        return 0
+    matches = {
+        m.id: m for m in db.query(Match.id, Match.competition_id, Match.home_team_id, Match.away_team_id, Match.zone)
+        .filter(Match.id.in_([c["id"] for c in changes]))
+    }
+    competition_ids = {m.competition_id for m in matches.values()}
+    materialized = {cid for (cid,) in db.query(Standing.competition_id).filter(Standing.competition_id.in_(competition_ids)).distinct()}
+    rebuild_standings(db, competition_ids - materialized)
+
+    memberships = {cid: load_zone_memberships(db, cid) for cid in materialized}
+    deltas = defaultdict(_empty_stats)
+    removed = defaultdict(_empty_stats)
+    for change in changes:
+        match = matches.get(change["id"])
+        if not match or match.competition_id not in materialized: continue
+        for state, sign in ((change["before"], -1), (change["after"], 1)):
+            contribution = match_contribution(state["home_score"], state["away_score"], state["status"])
+            if not contribution: continue
+            for team_id, stats in ((match.home_team_id, contribution[0]), (match.away_team_id, contribution[1])):
+                if not team_id: continue
+                for zone, key_team_id in standing_keys(match.zone, team_id, memberships[match.competition_id]):
+                    key = (match.competition_id, zone, key_team_id)
+                    for field in STAT_FIELDS:
+                        deltas[key][field] += sign * stats[field]
+                        if sign < 0:
+                            removed[key][field] += stats[field]
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return 0
+    existing = {
+        (s.competition_id, s.zone, s.team_id): s
+        for s in db.query(Standing).filter(Standing.competition_id.in_({key[0] for key in deltas}))
+    }
+    updates, inserts, deletes, out_of_sync = [], [], [], set()
+    for (competition_id, zone, team_id), delta in deltas.items():
+        row = existing.get((competition_id, zone, team_id))
+        current = {field: getattr(row, field) if row is not None else 0 for field in STAT_FIELDS}
+        if any(current[field] < removed[(competition_id, zone, team_id)][field] for field in STAT_FIELDS):
+            # El "before" no estaba contado en la tabla (ej: un partido escrito sin actualizarla)
+            out_of_sync.add(competition_id)
+            continue
+        values = {field: current[field] + delta[field] for field in STAT_FIELDS}
+        if zone == GENERAL_ZONE and values["played"] == 0:
+            # Igual que compute_standings: la tabla general solo lista equipos con partidos jugados
+            if row is not None:
+                deletes.append((competition_id, row.id))
+        elif row is None:
+            inserts.append((competition_id, {"competition_id": competition_id, "zone": zone, "team_id": team_id, **values}))
+        else:
+            updates.append((competition_id, {"id": row.id, **values}))
+
+    to_update = [values for competition_id, values in updates if competition_id not in out_of_sync]
+    to_insert = [values for competition_id, values in inserts if competition_id not in out_of_sync]
+    to_delete = [row_id for competition_id, row_id in deletes if competition_id not in out_of_sync]
+    if to_update:
+        db.execute(update(Standing), to_update)
+    if to_insert:
+        db.execute(insert(Standing), to_insert)
+    if to_delete:
+        db.execute(delete(Standing).where(Standing.id.in_(to_delete)))
+    if out_of_sync:
+        rebuild_standings(db, out_of_sync)
+    return len(deltas)
+
+def read_standings(db: Session, competition_id: int, zone: str = None) -> list:
+    """
+    Lectura indexada de una tabla materializada, ya ordenada por puntos, diferencia y goles a favor.
+    """
+    return db.query(Standing).options(joinedload(Standing.team))\
+        .filter(Standing.competition_id == competition_id, Standing.zone == (zone or GENERAL_ZONE))\
+        .order_by(Standing.points.desc(), (Standing.goals_for - Standing.goals_against).desc(), Standing.goals_for.desc(), Standing.team_id)\
+        .all()
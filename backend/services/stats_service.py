@@ -1,66 +1,50 @@
 # backend/services/stats_service.py
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func, case
+from sqlalchemy import func, case, select, union_all
 from models import Match, Team, Event, Player
-from collections import defaultdict
+from services.standings_store import PLAYED_STATUSES
+from services.zone_scope import get_zone_scope
 
 def get_clean_sheets_ranking(db: Session, competition_id: int, zone: str = None):
     """
     Calcula el ranking de equipos por vallas invictas (partidos sin recibir goles).
     Filtra por competición y, opcionalmente, por zona (incluyendo interzonales).
+    Un único agregado sobre la unión local/visitante de los partidos jugados.
     """
-    matches_query = db.query(Match).filter(Match.competition_id == competition_id)
-
+    match_filters = [
+        Match.competition_id == competition_id,
+        Match.status.in_(PLAYED_STATUSES),
+        Match.home_score.isnot(None),
+        Match.away_score.isnot(None)
+    ]
     if zone:
-        zone_matches = matches_query.filter(Match.zone == zone).all()
-        zone_team_ids = set()
-        for match in zone_matches:
-            if match.home_team_id: zone_team_ids.add(match.home_team_id)
-            if match.away_team_id: zone_team_ids.add(match.away_team_id)
-
-        if not zone_team_ids:
+        scope = get_zone_scope(db, competition_id, zone)
+        if not scope:
             return []
+        match_filters.append(Match.id.in_(scope.match_ids))
+
+    # Una fila por equipo y partido: (equipo, 1 si no recibió goles)
+    sides = union_all(
+        select(Match.home_team_id.label("team_id"), case((Match.away_score == 0, 1), else_=0).label("clean_sheet")).where(*match_filters),
+        select(Match.away_team_id.label("team_id"), case((Match.home_score == 0, 1), else_=0).label("clean_sheet")).where(*match_filters)
+    ).subquery()
+
+    clean_sheets = func.sum(sides.c.clean_sheet).label("clean_sheets")
+    played = func.count().label("played")
+    query = db.query(Team.id, Team.name, clean_sheets, played)\
+        .join(sides, sides.c.team_id == Team.id)
+    if zone:
+        # Solo los equipos de la zona, igual que la tabla de posiciones
+        query = query.filter(Team.id.in_(scope.team_ids))
 
-        matches = matches_query.filter(
-            or_(Match.zone == zone, Match.zone == 'INTERZONAL'),
-            or_(Match.home_team_id.in_(zone_team_ids), Match.away_team_id.in_(zone_team_ids))
-        ).all()
-    else:
-        matches = matches_query.all()
-
-    clean_sheets = defaultdict(lambda: {'team_id': 0, 'team_name': '', 'clean_sheets': 0, 'played': 0})
-    processed_teams = set()
-
-    for match in matches:
-        if match.home_score is None or match.away_score is None: continue
-        home_id, away_id = match.home_team_id, match.away_team_id
-
-        if home_id not in processed_teams:
-            team = db.query(Team).filter(Team.id == home_id).first()
-            if team: 
-                clean_sheets[home_id]['team_name'] = team.name
-                clean_sheets[home_id]['team_id'] = home_id
-                processed_teams.add(home_id)
-        
-        if home_id in clean_sheets:
-            clean_sheets[home_id]['played'] += 1
-            if match.away_score == 0:
-                clean_sheets[home_id]['clean_sheets'] += 1
-
-        if away_id not in processed_teams:
-            team = db.query(Team).filter(Team.id == away_id).first()
-            if team:
-                clean_sheets[away_id]['team_name'] = team.name
-                clean_sheets[away_id]['team_id'] = away_id
-                processed_teams.add(away_id)
-
-        if away_id in clean_sheets:
-            clean_sheets[away_id]['played'] += 1
-            if match.home_score == 0:
-                clean_sheets[away_id]['clean_sheets'] += 1
+    results = query.group_by(Team.id, Team.name)\
+        .order_by(clean_sheets.desc(), played, Team.name)\
+        .all()
 
-    ranking = sorted(clean_sheets.values(), key=lambda x: (-x['clean_sheets'], x['played']))
-    return ranking
+    return [
+        {"team_id": r.id, "team_name": r.name, "clean_sheets": int(r.clean_sheets), "played": r.played}
+        for r in results
+    ]
 
 def get_player_sanctions_ranking(db: Session, competition_id: int, zone: str = None):
     """
@@ -69,17 +53,10 @@ def get_player_sanctions_ranking(db: Session, competition_id: int, zone: str = N
     matches_query = db.query(Match.id).filter(Match.competition_id == competition_id)
 
     if zone:
-        zone_matches = db.query(Match).filter(Match.competition_id == competition_id, Match.zone == zone).all()
-        zone_team_ids = {m.home_team_id for m in zone_matches} | {m.away_team_id for m in zone_matches}
-        
-        if not zone_team_ids:
+        scope = get_zone_scope(db, competition_id, zone)
+        if not scope:
             return []
-
-        match_ids = db.query(Match.id).filter(
-            Match.competition_id == competition_id,
-            or_(Match.zone == zone, Match.zone == 'INTERZONAL'),
-            or_(Match.home_team_id.in_(zone_team_ids), Match.away_team_id.in_(zone_team_ids))
-        ).scalar_subquery()
+        match_ids = scope.match_ids
     else:
         match_ids = matches_query.scalar_subquery()
 
@@ -0,0 +1,49 @@
+# backend/services/sync_checkpoints.py
+import hashlib
+import json
+from datetime import datetime
+from sqlalchemy.orm import Session
+from models import SyncCheckpoint
+
+def page_content_hash(results: list) -> str:
+    """
+    Hash estable del contenido de una página de reporte.
+    """
+    payload = json.dumps(results, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ReportCheckpoints:
+    """
+    Puntos de control de un reporte de COMET: hash y cantidad de filas por página.
+
+    En modo incremental se piden todas las páginas (en paralelo) y se omiten las que tienen
+    el mismo hash que la vez anterior. COMET no garantiza que las filas nuevas lleguen al
+    final (p. ej. la temporada más reciente aparece primero), así que no se puede retomar
+    desde la última página: si se insertan filas al principio, cambia el hash de todas las
+    páginas siguientes y se vuelven a procesar.
+    """
+    def __init__(self, db: Session, report_id: int):
+        self.db = db
+        self.report_id = report_id
+        self.pages = {c.page: c for c in db.query(SyncCheckpoint).filter(SyncCheckpoint.report_id == report_id)}
+
+    def is_unchanged(self, page: int, content_hash: str) -> bool:
+        checkpoint = self.pages.get(page)
+        return checkpoint is not None and checkpoint.content_hash == content_hash
+
+    def record(self, page: int, results: list, content_hash: str):
+        checkpoint = self.pages.get(page)
+        if checkpoint is None:
+            checkpoint = SyncCheckpoint(report_id=self.report_id, page=page)
+            self.db.add(checkpoint)
+            self.pages[page] = checkpoint
+        checkpoint.content_hash = content_hash
+        checkpoint.row_count = len(results)
+        checkpoint.synced_at = datetime.utcnow()
+
+    def prune(self, last_page: int):
+        """
+        Elimina los puntos de control de páginas que ya no existen en el reporte.
+        """
+        for page in [p for p in self.pages if p > last_page]:
+            self.db.delete(self.pages.pop(page))
@@ -0,0 +1,195 @@
+# backend/services/sync_jobs.py
+import os
+import threading
+import uuid
+from datetime import datetime
+from sqlalchemy import text
+from database import engine
+from services.sync_service import run_final_sync
+
+# Clave del advisory lock de PostgreSQL que identifica "hay una sincronización en curso"
+SYNC_ADVISORY_LOCK_KEY = 20250715
+# Cantidad de trabajos terminados que se conservan para consultar su estado
+SYNC_JOBS_HISTORY = 20
+
+SYNC_STEPS = ("zones", "events", "scores")
+
+
+class SyncAlreadyRunning(Exception):
+    pass
+
+
+class SyncLock:
+    """
+    Candado global de sincronización, compartido entre procesos (API y CLI).
+
+    PostgreSQL: pg_try_advisory_xact_lock dentro de una transacción abierta en una conexión
+    dedicada (funciona también detrás de PgBouncer en modo transacción, que no conserva los
+    locks de sesión). SQLite: lock exclusivo sobre un archivo junto a la base de datos (flock,
+    o msvcrt en Windows); el sistema lo libera si el proceso muere.
+    """
+    def __init__(self):
+        self._connection = None
+        self._transaction = None
+        self._file = None
+
+    def acquire(self):
+        if engine.dialect.name == "postgresql":
+            self._connection = engine.connect()
+            self._transaction = self._connection.begin()
+            locked = self._connection.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": SYNC_ADVISORY_LOCK_KEY}).scalar()
+            if not locked:
+                self.release()
+                raise SyncAlreadyRunning()
+        else:
+            self._file = open(_sqlite_lock_path(), "a+")
+            try:
+                _lock_file(self._file)
+            except OSError:
+                self.release()
+                raise SyncAlreadyRunning()
+        return self
+
+    def release(self):
+        if self._transaction is not None:
+            self._transaction.rollback()
+            self._transaction = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._file is not None:
+            _unlock_file(self._file)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+def _lock_file(file):
+    """
+    Lock exclusivo sin espera; lanza OSError si otro proceso lo tiene.
+    """
+    if os.name == "nt":
+        import msvcrt
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+def _unlock_file(file):
+    try:
+        if os.name == "nt":
+            import msvcrt
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(file, fcntl.LOCK_UN)
+    except OSError:
+        # No lo teníamos tomado (acquire falló): cerrar el archivo alcanza
+        pass
+
+def _sqlite_lock_path() -> str:
+    database = engine.url.database or "ligachajari.db"
+    if database == ":memory:":
+        database = "ligachajari.db"
+    return f"{os.path.abspath(database)}.sync.lock"
+
+
+class SyncJob:
+    """
+    Estado de una sincronización en segundo plano, con el avance de cada paso.
+    """
+    def __init__(self, incremental: bool, zones_report_id: int = None):
+        self.id = uuid.uuid4().hex
+        self.incremental = incremental
+        self.zones_report_id = zones_report_id
+        self.status = "running"
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+        self.steps = {step: {"status": "pending"} for step in SYNC_STEPS}
+        self.result = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def report(self, step: str, **info):
+        """
+        Callback de progreso para run_final_sync: actualiza el estado de un paso.
+        """
+        with self._lock:
+            self.steps.setdefault(step, {}).update(info)
+
+    def finish(self, result: dict = None, error: str = None):
+        with self._lock:
+            self.result = result
+            self.error = error or (result or {}).get("error")
+            self.status = "failed" if self.error else "succeeded"
+            self.finished_at = datetime.utcnow()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "incremental": self.incremental,
+                "created_at": self.created_at.isoformat(),
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "steps": {step: dict(info) for step, info in self.steps.items()},
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+# --- REGISTRO DE TRABAJOS (en memoria del proceso) ---
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def get_sync_job(job_id: str):
+    return _jobs.get(job_id)
+
+def get_running_sync_job():
+    for job in list(_jobs.values()):
+        if job.status == "running":
+            return job
+    return None
+
+def _register(job: SyncJob):
+    with _jobs_lock:
+        _jobs[job.id] = job
+        finished = [j for j in _jobs.values() if j.status != "running"]
+        for old in sorted(finished, key=lambda j: j.created_at)[:-SYNC_JOBS_HISTORY]:
+            del _jobs[old.id]
+
+def start_sync_job(incremental: bool = False, zones_report_id: int = None, on_finish=None) -> SyncJob:
+    """
+    Toma el candado de sincronización y lanza run_final_sync en un hilo aparte.
+    Lanza SyncAlreadyRunning si ya hay otra sincronización en curso (en este u otro proceso).
+    `on_finish` se ejecuta en el hilo después de marcar el trabajo como terminado, con el
+    candado todavía tomado; si falla, el error se registra sin cambiar el resultado del trabajo.
+    """
+    lock = SyncLock().acquire()
+    job = SyncJob(incremental, zones_report_id)
+    _register(job)
+
+    def run():
+        try:
+            try:
+                result = run_final_sync(zones_report_id=zones_report_id, incremental=incremental, progress=job.report)
+                job.finish(result)
+            except Exception as e:
+                print(f"❌ Error en el trabajo de sincronización {job.id}: {e}")
+                job.finish(error=str(e))
+            if on_finish:
+                try:
+                    on_finish()
+                except Exception as e:
+                    print(f"❌ Error al publicar los resultados de la sincronización {job.id}: {e}")
+        finally:
+            lock.release()
+
+    threading.Thread(target=run, name=f"sync-job-{job.id[:8]}", daemon=True).start()
+    return job
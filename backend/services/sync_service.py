@@ -1,15 +1,21 @@
 import requests
 from datetime import datetime
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from database import SessionLocal
-from models import Match, Team, Competition, Player, Event
+from models import Match, Team, Competition, Player, SyncLog
+from services.comet_client import iter_report_pages
+from services.event_writer import EventUpserter, sanitize_minute
+from services.score_reconciliation import reconcile_match_scores
+from services.sync_checkpoints import ReportCheckpoints, page_content_hash
+from services.cache import bump_generation
+from services.standings_store import apply_match_result_changes, rebuild_standings
 import os
 
 # --- CONFIGURACIÓN ---
 API_KEY = os.getenv("COMET_API_KEY_3") # Para Partidos
 EVENTS_API_KEY = os.getenv("COMET_API_KEY_1") # Para Eventos
 ZONES_API_KEY = os.getenv("COMET_API_KEY_2") # Para Zonas
-BASE_URL = "https://latam.analyticom.de/data-backend/api/public/areports/run"
 MATCHES_TEMPLATE_ID = 3318704
 EVENTS_TEMPLATE_ID = 3315314
 ZONES_TEMPLATE_ID = 3315540
@@ -63,20 +69,37 @@ def _get_or_create_player(db: Session, row: dict, team_id: int):
     players_cache[person_id] = new_player
     return new_player
 
-def run_final_sync(zones_report_id: int = None):
+def _no_progress(step: str, **info):
+    pass
+
+def run_final_sync(zones_report_id: int = None, incremental: bool = False, progress=None):
+    """
+    Sincroniza zonas, eventos y marcadores desde los reportes de COMET.
+    En modo incremental omite las páginas cuyo contenido no cambió respecto de
+    `sync_checkpoints`; los cambios en cualquier página del reporte se toman igual.
+    `progress(step, **info)` recibe el avance de cada paso ("zones", "events", "scores").
+    Devuelve un resumen con los conteos y, si falló, el error.
+    """
     global competitions_cache, teams_cache, players_cache, matches_cache
+    progress = progress or _no_progress
+    summary = {"new_events": 0, "updated_zones": 0, "updated_scores": 0, "error": None}
     db = SessionLocal()
     if not API_KEY: 
         print("❌ Error: COMET_API_KEY_3 no está configurada.")
-        return
+        db.close()
+        summary["error"] = "COMET_API_KEY_3 no está configurada"
+        return summary
 
     competitions_cache.clear(); teams_cache.clear(); players_cache.clear(); matches_cache.clear()
 
     try:
-        print("🚀 Iniciando Sincronización Completa (V7)...")
+        print(f"🚀 Iniciando Sincronización {'Incremental' if incremental else 'Completa'} (V7)...")
         total_new_matches = 0
         total_new_events = 0
+        updated_zones_count = 0
+        updated_scores_count = 0
         changes_made = False
+        matches_with_new_events = set()
 
         # --- PASO 1: SINCRONIZAR PARTIDOS ---
         print("\n--- PASO 1: Sincronizando Partidos de 2025 ---")
@@ -141,24 +164,27 @@ def run_final_sync(zones_report_id: int = None):
         print("\n--- PASO 1.5: Sincronizando Zonas (si existen) ---")
         if not ZONES_API_KEY:
             print("⚠️  Advertencia: COMET_API_KEY_2 no está configurada. Saltando sincronización de zonas.")
+            progress("zones", status="skipped")
         else:
-            match_map = {m.match_id_comet: m.id for m in db.query(Match.match_id_comet, Match.id).join(Competition).filter(Competition.season == "2025").yield_per(1000)}
+            progress("zones", status="running", pages=0, updated=0)
+            match_map = {m.match_id_comet: [m.id, m.zone] for m in db.query(Match.match_id_comet, Match.id, Match.zone).join(Competition).filter(Competition.season == "2025").yield_per(1000)}
             
             if not match_map:
                 print("   -> No se encontraron partidos de la temporada 2025 para actualizar zonas.")
             else:
-                updated_zones_count = 0
-                page = 0
                 template_id_to_use = zones_report_id if zones_report_id is not None else ZONES_TEMPLATE_ID
                 print(f"   -> Usando Report Template ID para Zonas: {template_id_to_use}")
-                while True:
-                    url = f"{BASE_URL}/{template_id_to_use}/{page}/999/?API_KEY={ZONES_API_KEY}"
-                    try:
-                        response = requests.get(url, timeout=30)
-                        response.raise_for_status()
-                        data = response.json()
+                zones_checkpoints = ReportCheckpoints(db, template_id_to_use)
+                zone_updated_match_ids = set()
+                page = None
+                try:
+                    for page, data in iter_report_pages(template_id_to_use, ZONES_API_KEY):
                         results = data.get("results", [])
-                        if not results: break
+                        content_hash = page_content_hash(results)
+                        if incremental and zones_checkpoints.is_unchanged(page, content_hash):
+                            print(f"   -> Página {page} de zonas sin cambios. Omitida.")
+                            continue
+                        zone_updates = {}
 
                         for row in results:
                             match_id_comet = row.get("matchId")
@@ -169,26 +195,38 @@ def run_final_sync(zones_report_id: int = None):
                                     parsed_zone = raw_zone_name.split(" - ")[-1].strip()
 
                                 if parsed_zone:
-                                    match_db_id = match_map[match_id_comet]
-                                    match_to_update = db.query(Match).filter(Match.id == match_db_id).first()
-                                    if match_to_update and match_to_update.zone != parsed_zone:
-                                        match_to_update.zone = parsed_zone
-                                        updated_zones_count += 1
-                                        changes_made = True
+                                    match_entry = match_map[match_id_comet]
+                                    if match_entry[1] != parsed_zone:
+                                        match_entry[1] = parsed_zone
+                                        zone_updates[match_entry[0]] = parsed_zone
+
+                        # Un único UPDATE masivo por página con las zonas que cambiaron
+                        if zone_updates:
+                            db.execute(update(Match), [{"id": match_db_id, "zone": zone} for match_db_id, zone in zone_updates.items()])
+                            updated_zones_count += len(zone_updates)
+                            zone_updated_match_ids.update(zone_updates)
+                            changes_made = True
                         
+                        zones_checkpoints.record(page, results, content_hash)
+                        progress("zones", pages=page + 1, updated=updated_zones_count)
                         print(f"   -> Página {page} de zonas procesada.")
-                        if page >= data.get("lastPage", 0): break
-                        page += 1
-                        
-                        if page % 10 == 0:
-                            print(f"   ->  menjaga koneksi... Guardando lote de zonas en la página {page}.")
+                        if (page + 1) % 10 == 0:
+                            print(f"   ->  menjaga koneksi... Guardando lote de zonas en la página {page + 1}.")
                             db.commit()
 
-                    except requests.exceptions.RequestException as e:
-                        print(f"   -> ❌ Error al contactar la API de Zonas: {e}. Saltando.")
-                        break
+                    if page is not None:
+                        zones_checkpoints.prune(page)
+                except requests.exceptions.RequestException as e:
+                    print(f"   -> ❌ Error al contactar la API de Zonas: {e}. Saltando.")
                 print(f"   -> Se actualizaron las zonas de {updated_zones_count} partidos.")
 
+                # Cambiar zonas altera qué equipos integra cada tabla: reconstruir esas competiciones
+                if zone_updated_match_ids:
+                    affected_competitions = {cid for (cid,) in db.query(Match.competition_id).filter(Match.id.in_(zone_updated_match_ids)).distinct()}
+                    rebuild_standings(db, affected_competitions)
+                    print(f"   -> Tablas de posiciones reconstruidas para {len(affected_competitions)} competiciones.")
+            progress("zones", status="done", updated=updated_zones_count)
+
         # --- PASO 1.8: COMMIT Y REAPERTURA DE SESIÓN para evitar timeout ---
         print("\n💾 Guardando cambios y refrescando la sesión de BD antes de Eventos...")
         db.commit()
@@ -200,18 +238,21 @@ def run_final_sync(zones_report_id: int = None):
         print("\n--- PASO 2: Sincronizando Eventos de 2025 ---")
         if not EVENTS_API_KEY:
             print("⚠️  Advertencia: COMET_API_KEY_1 no está configurada. Saltando sincronización de eventos.")
+            progress("events", status="skipped")
         else:
+            progress("events", status="running", pages=0, inserted=0)
             matches_cache = {m.match_id_comet: m.id for m in db.query(Match.match_id_comet, Match.id).yield_per(1000)}
             teams_cache.update({t.team_id_comet: t.id for t in db.query(Team.team_id_comet, Team.id).yield_per(1000)})
-            matches_with_new_events = set()
-            page = 0
-            while True:
-                url = f"{BASE_URL}/{EVENTS_TEMPLATE_ID}/{page}/999/?API_KEY={EVENTS_API_KEY}"
-                response = requests.get(url, timeout=30)
-                response.raise_for_status()
-                data = response.json()
+            event_upserter = EventUpserter(db, update_fields=("is_home",))
+            events_checkpoints = ReportCheckpoints(db, EVENTS_TEMPLATE_ID)
+            page = None
+            for page, data in iter_report_pages(EVENTS_TEMPLATE_ID, EVENTS_API_KEY):
                 results = data.get("results", [])
-                if not results: break
+                content_hash = page_content_hash(results)
+                if incremental and events_checkpoints.is_unchanged(page, content_hash):
+                    print(f"   -> Página {page} de eventos sin cambios. Omitida.")
+                    continue
+                page_events = []
 
                 for row in results:
                     if row.get("season") != "2025": continue
@@ -224,74 +265,65 @@ def run_final_sync(zones_report_id: int = None):
                     player = _get_or_create_player(db, row, team_db_id)
                     if not player: continue
 
-                    minute_from_api = row.get("minute")
-                    sanitized_minute = int(minute_from_api) if isinstance(minute_from_api, int) or (isinstance(minute_from_api, str) and minute_from_api.isdigit()) else None
 
-                    existing_event = db.query(Event).filter_by(match_id=match_db_id, player_id=player.id, event_type=row.get("matchEventType"), minute=sanitized_minute, phase=row.get("phase")).first()
                     is_home_correct = str(row.get("home")).lower() in ["sí", "yes"]
+                    page_events.append(dict(match_id=match_db_id, player_id=player.id, team_id=team_db_id, event_type=row.get("matchEventType"), sub_type=row.get("eventSubType"), minute=sanitize_minute(row.get("minute")), phase=row.get("phase"), is_home=is_home_correct, stoppage_time=row.get("stoppageTime")))
 
-                    if existing_event:
-                        if existing_event.is_home != is_home_correct:
-                            existing_event.is_home = is_home_correct
-                            changes_made = True
-                            db.add(existing_event)
-                    else:
-                        new_event = Event(match_id=match_db_id, player_id=player.id, team_id=team_db_id, event_type=row.get("matchEventType"), sub_type=row.get("eventSubType"), minute=sanitized_minute, phase=row.get("phase"), is_home=is_home_correct, stoppage_time=row.get("stoppageTime"))
-                        db.add(new_event)
-                        total_new_events += 1
-                        changes_made = True
-                        matches_with_new_events.add(match_db_id)
+                inserted_events, updated_events_count = event_upserter.upsert(page_events)
+                if inserted_events or updated_events_count:
+                    changes_made = True
+                total_new_events += len(inserted_events)
+                matches_with_new_events.update(e["match_id"] for e in inserted_events)
 
+                events_checkpoints.record(page, results, content_hash)
+                progress("events", pages=page + 1, inserted=total_new_events)
                 print(f"   -> Página {page} de eventos procesada.")
-                if page >= data.get("lastPage", 0): break
-                page += 1
-
-                if page % 10 == 0:
-                    print(f"   ->  menjaga koneksi... Guardando lote de eventos en la página {page}.")
+                if (page + 1) % 10 == 0:
+                    print(f"   ->  menjaga koneksi... Guardando lote de eventos en la página {page + 1}.")
                     db.commit()
 
-            print(f"   -> Se añadieron {total_new_events} eventos nuevos a la sesión.")
+            if page is not None:
+                events_checkpoints.prune(page)
+            print(f"   -> Se añadieron {total_new_events} eventos nuevos.")
+            progress("events", status="done", inserted=total_new_events)
 
         # --- PASO 2.5: Actualizando Marcadores y Estados Post-Eventos ---
         print("\n--- PASO 2.5: Actualizando Marcadores y Estados ---")
+        progress("scores", status="running", matches=len(matches_with_new_events))
         if not matches_with_new_events:
             print("   -> No hay partidos con eventos nuevos para actualizar.")
         else:
             print(f"   -> Recalculando marcadores para {len(matches_with_new_events)} partidos con eventos nuevos...")
-            updated_scores_count = 0
-            for match_id in matches_with_new_events:
-                match = db.query(Match).filter_by(id=match_id).first()
-                if not match: continue
-
-                home_goals = db.query(Event).filter(Event.match_id == match.id, Event.event_type.in_(['Goal', 'Own goal', 'Penalty']), Event.team_id == match.home_team_id).count()
-                away_goals = db.query(Event).filter(Event.match_id == match.id, Event.event_type.in_(['Goal', 'Own goal', 'Penalty']), Event.team_id == match.away_team_id).count()
-                
-                score_is_inconsistent = (match.home_score != home_goals) or (match.away_score != away_goals)
-                status_is_inconsistent = (home_goals + away_goals > 0) and (match.status in ['SCHEDULED', 'ENTERED'])
-
-                if score_is_inconsistent or status_is_inconsistent:
-                    match.home_score = home_goals
-                    match.away_score = away_goals
-                    if status_is_inconsistent: match.status = 'PLAYED'
-                    db.add(match)
-                    updated_scores_count += 1
-                    changes_made = True
-            
+            reconciliation = reconcile_match_scores(db, matches_with_new_events)
+            updated_scores_count = reconciliation["updated"]
+            if updated_scores_count:
+                changes_made = True
+                apply_match_result_changes(db, reconciliation["changes"])
             print(f"   -> Se actualizaron los marcadores/estados de {updated_scores_count} partidos.")
+        progress("scores", status="done", updated=updated_scores_count)
 
         # --- PASO 3: GUARDAR TODO ---
+        # El registro de la sincronización y los puntos de control se guardan siempre
+        db.add(SyncLog(records_processed=total_new_events + updated_zones_count + updated_scores_count))
         if changes_made:
             print(f"\n💾 Guardando cambios finales...")
             db.commit()
             print("✅ COMMIT EXITOSO.")
         else:
+            db.commit()
             print("\nℹ️ No hay cambios nuevos para guardar.")
+        summary.update(new_events=total_new_events, updated_zones=updated_zones_count, updated_scores=updated_scores_count)
 
     except requests.exceptions.HTTPError as http_err:
         print(f"❌ Error HTTP: {http_err} - {http_err.response.text}")
         db.rollback()
+        summary["error"] = f"Error HTTP: {http_err}"
     except Exception as e:
         print(f"❌ Error inesperado: {e}")
         db.rollback()
+        summary["error"] = f"Error inesperado: {e}"
     finally:
         db.close()
+        # Invalida las respuestas cacheadas: los datos pudieron cambiar (incluso con commits parciales)
+        bump_generation()
+    return summary
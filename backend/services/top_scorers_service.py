@@ -1,37 +1,50 @@
 # backend/services/top_scorers_service.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy import func
 from models import Event, Player, Team, Match
+from services.zone_scope import get_zone_scope
+
+# Goles que suman al goleador: igual que en el cálculo de marcadores, salvo los goles en contra
+SCORER_GOAL_TYPES = ["goal", "penalty"]
 
 def get_top_scorers(db: Session, competition_id: int, limit: int = 10, zone: str = None):
     """
-    Obtiene el top de goleadores de una competición.
-    Si se especifica una zona, filtra los resultados para esa zona.
+    Obtiene el top de goleadores de una competición con un único COUNT agrupado.
+    Si se especifica una zona, cuenta los goles de los equipos de esa zona en sus
+    partidos de zona e interzonales, igual que la tabla de posiciones.
+    Los goles se agrupan por jugador; si cambió de equipo, se muestra el de su último gol.
     """
-    # Filtrar eventos de tipo "Goal" (case-insensitive) en partidos de la competición
-    query = db.query(Event).join(Event.match).join(Event.player).join(Event.team).filter(
-        func.lower(Event.event_type) == "goal",
+    scored = db.query(
+        Event.player_id.label("player_id"),
+        func.count(Event.id).label("goals"),
+        func.max(Event.id).label("last_goal_id")
+    ).join(Match, Event.match_id == Match.id)\
+     .join(Team, Event.team_id == Team.id)\
+     .filter(
+        func.lower(Event.event_type).in_(SCORER_GOAL_TYPES),
         Match.competition_id == competition_id
-    )
+     )
 
-    # Añadir filtro de zona si se proporciona
+    # Añadir filtro de zona (con interzonales) si se proporciona
     if zone:
-        query = query.filter(Match.zone == zone)
+        scope = get_zone_scope(db, competition_id, zone)
+        if not scope:
+            return []
+        scored = scored.filter(Match.id.in_(scope.match_ids), Event.team_id.in_(scope.team_ids))
 
-    scorer_stats = {}
-    for event in query:
-        player = event.player
-        team = event.team
-        if player.id not in scorer_stats:
-            scorer_stats[player.id] = {
-                "player_id": player.id,
-                "player_name": player.name,
-                "team_name": team.name,
-                "goals": 0
-            }
-        scorer_stats[player.id]["goals"] += 1
+    scored = scored.group_by(Event.player_id).subquery()
+    last_goal = aliased(Event)
+    results = db.query(
+        Player.id.label("player_id"),
+        Player.name.label("player_name"),
+        Team.name.label("team_name"),
+        scored.c.goals
+    ).select_from(scored)\
+     .join(Player, scored.c.player_id == Player.id)\
+     .join(last_goal, scored.c.last_goal_id == last_goal.id)\
+     .join(Team, last_goal.team_id == Team.id)\
+     .order_by(scored.c.goals.desc(), Player.name)\
+     .limit(limit).all()
 
-    # Ordenar por goles y limitar
-    result = sorted(scorer_stats.values(), key=lambda x: -x["goals"])[:limit]
-    return result
\ No newline at end of file
+    return [dict(row._mapping) for row in results]
@@ -0,0 +1,67 @@
+# backend/services/zone_scope.py
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from models import Match
+from services.cache import GenerationCache
+from services.standings_store import INTERZONAL
+
+class ZoneScope:
+    """
+    Alcance de una zona: sus equipos y los partidos que le cuentan (de zona e interzonales
+    en los que juega alguno de sus equipos).
+    """
+    __slots__ = ("zone", "team_ids", "match_ids")
+
+    def __init__(self, zone: str, team_ids: frozenset, match_ids: frozenset):
+        self.zone = zone
+        self.team_ids = team_ids
+        self.match_ids = match_ids
+
+    def __bool__(self):
+        return bool(self.team_ids)
+
+
+class CompetitionZones:
+    """
+    Zonas de una competición precalculadas con una sola consulta: equipos y partidos por zona
+    y zonas de cada equipo (mismo criterio que las tablas de posiciones).
+    """
+    __slots__ = ("competition_id", "zones", "memberships", "_scopes")
+
+    def __init__(self, db: Session, competition_id: int):
+        self.competition_id = competition_id
+        rows = db.query(Match.id, Match.zone, Match.home_team_id, Match.away_team_id)\
+            .filter(Match.competition_id == competition_id).all()
+
+        teams_by_zone = defaultdict(set)
+        memberships = defaultdict(set)
+        for _, zone, home_id, away_id in rows:
+            if not zone:
+                continue
+            for team_id in (home_id, away_id):
+                if team_id:
+                    teams_by_zone[zone].add(team_id)
+                    memberships[team_id].add(zone)
+        self.memberships = dict(memberships)
+        self.zones = sorted(zone for zone in teams_by_zone if zone.strip() != '')
+
+        self._scopes = {}
+        for zone, team_ids in teams_by_zone.items():
+            match_ids = frozenset(
+                match_id for match_id, match_zone, home_id, away_id in rows
+                if match_zone in (zone, INTERZONAL) and (home_id in team_ids or away_id in team_ids)
+            )
+            self._scopes[zone] = ZoneScope(zone, frozenset(team_ids), match_ids)
+
+    def scope(self, zone: str) -> ZoneScope:
+        return self._scopes.get(zone) or ZoneScope(zone, frozenset(), frozenset())
+
+
+# --- CACHÉ POR COMPETICIÓN (se invalida con cada sincronización) ---
+_competition_zones = GenerationCache()
+
+def get_competition_zones(db: Session, competition_id: int) -> CompetitionZones:
+    return _competition_zones.get_or_compute(competition_id, lambda: CompetitionZones(db, competition_id))
+
+def get_zone_scope(db: Session, competition_id: int, zone: str) -> ZoneScope:
+    return get_competition_zones(db, competition_id).scope(zone)
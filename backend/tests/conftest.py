@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos del backend se importan desde su raíz (igual que main.py y los scripts)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Competition, Team, Player, Match, Event
+from services.event_writer import EventUpserter
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture
+def match(db):
+    competition = Competition(name="PRIMERA DIVISIÓN", season="2025")
+    home, away = Team(team_id_comet=1, name="Local"), Team(team_id_comet=2, name="Visitante")
+    db.add_all([competition, home, away])
+    db.flush()
+    db.add_all([Player(person_id=10 + i, name=f"Jugador {i}", team_id=home.id) for i in range(3)])
+    match = Match(match_id_comet=100, competition_id=competition.id, home_team_id=home.id, away_team_id=away.id, status="PLAYED")
+    db.add(match)
+    db.flush()
+    return match
+
+def _comet_rows(match) -> list:
+    """
+    Eventos como los arma la sincronización a partir de COMET: el minuto llega como texto.
+    """
+    return [
+        dict(match_id=match.id, player_id=1, team_id=match.home_team_id, event_type="Goal", minute="12", phase="FIRST_HALF", is_home=True),
+        dict(match_id=match.id, player_id=2, team_id=match.home_team_id, event_type="Yellow card", minute="67", phase="SECOND_HALF", is_home=True),
+        dict(match_id=match.id, player_id=3, team_id=match.home_team_id, event_type="Substitution", minute=None, phase="", is_home=True),
+    ]
+
+def _count(db) -> int:
+    return db.query(func.count(Event.id)).scalar()
+
+
+def test_rerun_with_text_minutes_inserts_nothing(db, match):
+    inserted, _ = EventUpserter(db).upsert(_comet_rows(match))
+    db.commit()
+    assert len(inserted) == 3
+    assert db.query(Event.minute).filter(Event.player_id == 1).scalar() == 12
+
+    # Una nueva sincronización carga las claves desde la BD y debe reconocer todos los eventos
+    inserted, _ = EventUpserter(db).upsert(_comet_rows(match))
+    db.commit()
+    assert inserted == []
+    assert _count(db) == 3
+
+def test_reports_only_rows_actually_inserted(db, match):
+    upserter = EventUpserter(db)
+    upserter._load_existing({match.id})
+    # Otro proceso escribe uno de los eventos después de que se cargaron las claves
+    db.execute(insert(Event), [dict(match_id=match.id, player_id=1, team_id=match.home_team_id, event_type="Goal", minute=12, phase="FIRST_HALF", is_home=True)])
+    inserted, _ = upserter.upsert(_comet_rows(match))
+    db.commit()
+    assert [row["player_id"] for row in inserted] == [2, 3]
+    assert _count(db) == 3
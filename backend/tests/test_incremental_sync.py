@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Competition, Team, Match, Event, SyncCheckpoint
+from services import comet_client, sync_service
+
+PAGE_SIZE = 3
+
+
+@pytest.fixture
+def Session(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        competition = Competition(name="PRIMERA DIVISIÓN", season="2025")
+        home, away = Team(team_id_comet=1, name="Local"), Team(team_id_comet=2, name="Visitante")
+        db.add_all([competition, home, away])
+        db.flush()
+        db.add(Match(match_id_comet=100, competition_id=competition.id, home_team_id=home.id, away_team_id=away.id, status="PLAYED"))
+        db.commit()
+
+    monkeypatch.setattr(sync_service, "SessionLocal", Session)
+    monkeypatch.setattr(sync_service, "API_KEY", "partidos")
+    monkeypatch.setattr(sync_service, "EVENTS_API_KEY", "eventos")
+    monkeypatch.setattr(sync_service, "ZONES_API_KEY", None)
+    yield Session
+    engine.dispose()
+
+@pytest.fixture
+def report(monkeypatch):
+    """
+    Reporte de eventos de COMET simulado: cada test puede modificar las filas entre sincronizaciones.
+    """
+    rows = [_comet_event(minute) for minute in range(10, 70, 10)]
+
+    def fetch_report_page(template_id, page, api_key, page_size=comet_client.PAGE_SIZE, timeout=30):
+        assert template_id == sync_service.EVENTS_TEMPLATE_ID
+        pages = [rows[i:i + PAGE_SIZE] for i in range(0, len(rows), PAGE_SIZE)]
+        return {"results": pages[page] if page < len(pages) else [], "lastPage": len(pages) - 1}
+
+    monkeypatch.setattr(comet_client, "fetch_report_page", fetch_report_page)
+    return rows
+
+def _comet_event(minute: int, person_id: int = 10) -> dict:
+    return dict(season="2025", matchId=100, teamId=1, personId=person_id, personName="Jugador", matchEventType="Yellow card", minute=str(minute), phase="FIRST_HALF", home="Sí")
+
+def _event_count(Session) -> int:
+    with Session() as db:
+        return db.query(func.count(Event.id)).scalar()
+
+def test_incremental_sync_picks_up_prepended_rows(Session, report):
+    summary = sync_service.run_final_sync()
+    assert summary["error"] is None
+    assert _event_count(Session) == 6
+
+    # COMET lista primero lo más reciente: las filas nuevas desplazan a todas las páginas
+    report[:0] = [_comet_event(75, person_id=11), _comet_event(80, person_id=11)]
+    summary = sync_service.run_final_sync(incremental=True)
+
+    assert summary["error"] is None
+    assert summary["new_events"] == 2
+    assert _event_count(Session) == 8
+    with Session() as db:
+        assert [c.page for c in db.query(SyncCheckpoint).order_by(SyncCheckpoint.page)] == [0, 1, 2]
+
+def test_incremental_sync_skips_unchanged_pages(Session, report, capsys):
+    sync_service.run_final_sync()
+    capsys.readouterr()
+
+    summary = sync_service.run_final_sync(incremental=True)
+
+    assert summary["error"] is None
+    assert summary["new_events"] == 0
+    assert capsys.readouterr().out.count("de eventos sin cambios. Omitida.") == 2
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import create_engine, func, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Competition, Team, Match, Event
+from services.event_writer import EventUpserter
+from services.schema_upgrade import upgrade_schema
+
+# Tabla de eventos como la crearon las versiones anteriores: sin uq_events_natural_key
+LEGACY_EVENTS_TABLE = """
+CREATE TABLE events (
+    id INTEGER PRIMARY KEY, match_id INTEGER, player_id INTEGER, team_id INTEGER,
+    event_type VARCHAR, sub_type VARCHAR, minute INTEGER, phase VARCHAR, is_home BOOLEAN,
+    second_player_id INTEGER, accumulated_yellow VARCHAR, stoppage_time INTEGER, updated_at DATETIME
+)
+"""
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_EVENTS_TABLE))
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def _event(match_id, player_id, minute, event_type="Goal"):
+    return dict(match_id=match_id, player_id=player_id, team_id=1, event_type=event_type, minute=minute, phase="FIRST_HALF", is_home=True)
+
+def _seed_match(db) -> int:
+    competition, team = Competition(name="PRIMERA DIVISIÓN", season="2025"), Team(team_id_comet=1, name="Local")
+    db.add_all([competition, team])
+    db.flush()
+    match = Match(match_id_comet=100, competition_id=competition.id, home_team_id=team.id, away_team_id=team.id, status="PLAYED")
+    db.add(match)
+    db.flush()
+    return match.id
+
+
+def test_upgrade_dedupes_and_adds_natural_key(engine):
+    db = sessionmaker(bind=engine)()
+    match_id = _seed_match(db)
+    # Duplicados que dejaban las sincronizaciones sobre la tabla sin restricción
+    db.execute(Event.__table__.insert(), [_event(match_id, 1, 10), _event(match_id, 1, 10), _event(match_id, 1, 10), _event(match_id, 2, 30)])
+    db.commit()
+
+    upgrade_schema(engine)
+
+    assert "uq_events_natural_key" in {ix["name"] for ix in inspect(engine).get_indexes("events")}
+    assert db.query(func.count(Event.id)).scalar() == 2
+    assert db.query(func.min(Event.id)).filter(Event.player_id == 1).scalar() == 1
+
+    # Sucesivas sincronizaciones (minutos como texto, igual que COMET) no duplican nada
+    rows = [_event(match_id, 1, "10"), _event(match_id, 2, "30"), _event(match_id, 3, "75")]
+    for expected_inserted in (1, 0, 0):
+        inserted, _ = EventUpserter(db).upsert(rows)
+        db.commit()
+        assert len(inserted) == expected_inserted
+    assert db.query(func.count(Event.id)).scalar() == 3
+    db.close()
+
+def test_upgrade_is_idempotent(engine):
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+    names = [ix["name"] for ix in inspect(engine).get_indexes("events")]
+    assert names.count("uq_events_natural_key") == 1
@@ -0,0 +1,105 @@
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Competition, Team, Match, Standing
+from services.standings_store import INTERZONAL, STAT_FIELDS, apply_match_result_changes, compute_standings, rebuild_standings
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture
+def league(db):
+    """
+    Una competición con dos zonas de tres equipos, partidos de zona e interzonales.
+    """
+    competition = Competition(name="PRIMERA DIVISIÓN", season="2025")
+    db.add(competition)
+    db.flush()
+    teams = [Team(team_id_comet=100 + i, name=f"Club {i}") for i in range(6)]
+    db.add_all(teams)
+    db.flush()
+    a, b = [t.id for t in teams[:3]], [t.id for t in teams[3:]]
+    fixture = [
+        ("A", a[0], a[1], 2, 1, "PLAYED"),
+        ("A", a[1], a[2], 0, 0, "PLAYED"),
+        ("A", a[2], a[0], None, None, "SCHEDULED"),
+        ("B", b[0], b[1], 1, 3, "PLAYED"),
+        ("B", b[1], b[2], 2, 2, "CORRECT"),
+        ("B", b[2], b[0], None, None, "SCHEDULED"),
+        (INTERZONAL, a[0], b[0], 1, 0, "PLAYED"),
+        (INTERZONAL, b[1], a[1], None, None, "SCHEDULED"),
+    ]
+    matches = [
+        Match(match_id_comet=1000 + i, competition_id=competition.id, home_team_id=home, away_team_id=away,
+              zone=zone, home_score=home_score, away_score=away_score, status=status)
+        for i, (zone, home, away, home_score, away_score, status) in enumerate(fixture)
+    ]
+    db.add_all(matches)
+    db.flush()
+    rebuild_standings(db, [competition.id])
+    db.flush()
+    return competition, matches
+
+def _set_result(db, match, home_score, away_score, status) -> dict:
+    """
+    Escribe el resultado igual que reconcile_match_scores y devuelve el cambio.
+    """
+    change = {
+        "id": match.id,
+        "before": {"home_score": match.home_score, "away_score": match.away_score, "status": match.status},
+        "after": {"home_score": home_score, "away_score": away_score, "status": status},
+    }
+    db.execute(update(Match), [{"id": match.id, **change["after"]}])
+    db.expire(match)
+    return change
+
+def _materialized(db, competition_id) -> dict:
+    return {
+        (s.zone, s.team_id): {field: getattr(s, field) for field in STAT_FIELDS}
+        for s in db.query(Standing).filter(Standing.competition_id == competition_id)
+    }
+
+
+def test_rebuild_matches_compute(db, league):
+    competition, _ = league
+    assert _materialized(db, competition.id) == compute_standings(db, competition.id)
+
+def test_deltas_match_full_recompute(db, league):
+    competition, matches = league
+    changes = [
+        _set_result(db, matches[0], 1, 1, "PLAYED"),      # corrección de marcador
+        _set_result(db, matches[2], 3, 0, "PLAYED"),      # partido que se jugó
+        _set_result(db, matches[4], 2, 2, "SCHEDULED"),   # deja de contar
+        _set_result(db, matches[7], 0, 2, "PLAYED"),      # interzonal: suma en general y en ambas zonas
+    ]
+    apply_match_result_changes(db, changes)
+    db.flush()
+    assert _materialized(db, competition.id) == compute_standings(db, competition.id)
+
+def test_unmaterialized_match_triggers_rebuild(db, league):
+    competition, matches = league
+    # Un partido con marcador escrito sin tocar las tablas (como hacía sync_service_ba)
+    db.execute(update(Match), [{"id": matches[5].id, "home_score": 0, "away_score": 4, "status": "PLAYED"}])
+    db.expire(matches[5])
+    change = _set_result(db, matches[5], 1, 4, "PLAYED")
+    apply_match_result_changes(db, [change])
+    db.flush()
+    assert _materialized(db, competition.id) == compute_standings(db, competition.id)
+
+def test_unmaterialized_competition_is_rebuilt(db, league):
+    competition, matches = league
+    db.query(Standing).filter(Standing.competition_id == competition.id).delete()
+    change = _set_result(db, matches[1], 3, 1, "PLAYED")
+    apply_match_result_changes(db, [change])
+    db.flush()
+    assert _materialized(db, competition.id) == compute_standings(db, competition.id)
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, Competition, Team, Player, Match, Event
+from services.top_scorers_service import get_top_scorers
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+def test_player_who_changed_teams_is_counted_once(db):
+    competition = Competition(name="PRIMERA DIVISIÓN", season="2025")
+    first, second, rival = Team(team_id_comet=1, name="Primero"), Team(team_id_comet=2, name="Segundo"), Team(team_id_comet=3, name="Rival")
+    db.add_all([competition, first, second, rival])
+    db.flush()
+    striker = Player(person_id=10, name="Goleador", team_id=first.id)
+    other = Player(person_id=11, name="Otro", team_id=rival.id)
+    db.add_all([striker, other])
+    db.flush()
+
+    goals = [(first, striker), (first, striker), (second, striker), (rival, other), (rival, other)]
+    for i, (team, player) in enumerate(goals):
+        match = Match(match_id_comet=100 + i, competition_id=competition.id, home_team_id=team.id, away_team_id=rival.id if team is not rival else first.id, status="PLAYED")
+        db.add(match)
+        db.flush()
+        db.add(Event(match_id=match.id, player_id=player.id, team_id=team.id, event_type="Goal", minute=10 + i, phase="FIRST_HALF", is_home=True))
+    db.flush()
+
+    scorers = get_top_scorers(db, competition.id)
+
+    assert scorers == [
+        {"player_id": striker.id, "player_name": "Goleador", "team_name": "Segundo", "goals": 3},
+        {"player_id": other.id, "player_name": "Otro", "team_name": "Rival", "goals": 2},
+    ]